@@ -1,12 +1,17 @@
 import streamlit as st
 import numpy as np
-import cv2
 from PIL import Image
-from math import radians, sin, cos
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
 import tempfile
 import os
+from image_engine import (
+    translation_matrix, scaling_matrix, rotation_matrix, shearing_matrix,
+    reflection_matrix, TransformStack, apply_affine_transform,
+    get_convolution_kernel, select_convolution_backend, convolve_image,
+    remove_background_grabcut, default_roi, make_proxy, proxy_matrix,
+    proxy_kernel_size, draw_roi_preview, generate_pdf_report,
+)
+from image_cache import ResultCache, content_hash, make_key
+from instrumentation import StageRecorder, stage, timed, use_recorder, sidebar_panel
 
 # ================== LANGUAGE & THEME ==================
 st.sidebar.title("⚙️ Settings")
@@ -89,6 +94,9 @@ T = {
         "reflection_axis": "Reflection Axis",
         "reflection_opts": ["Horizontal (x-axis)", "Vertical (y-axis)"],
         "btn_apply": "Apply Transformation",
+        "chain_add": "➕ Add to Chain",
+        "chain_clear": "🧹 Clear Chain",
+        "chain_label": "Chain (single warp):",
         "conv_filter": "Select Filter",
         "conv_opts": ["Blur", "Sharpen", "Edge Detection", "Emboss"],
         "kernel_size": "Kernel Size",
@@ -100,6 +108,8 @@ T = {
         "bg_w": "ROI Width",
         "bg_h": "ROI Height",
         "bg_btn": "Remove Background",
+        "bg_quality": "Quality / Speed",
+        "bg_quality_opts": ["Full resolution (slowest)", "Quality", "Balanced", "Fast"],
         "bg_save": "Save Result",
 
         "team_title": "👥 Our Team",
@@ -113,6 +123,8 @@ T = {
         "report_title": "Report Title",
         "report_default": "Matrix Image Processing Report",
         "report_btn": "Create PDF Report",
+        "report_compress": "Compress images (JPEG at print resolution)",
+        "report_dpi": "Print DPI",
         "report_error": "❗ Please process an image first before generating report",
         "report_download": "📥 Download PDF Report",
         "report_success": "✅ PDF Created Successfully!",
@@ -122,6 +134,7 @@ T = {
         "filtered_caption": "Filtered Result 🎉",
         "bg_removed_caption": "Background Removed 🎉",
         "roi_preview": "ROI Selection Preview",
+        "live_preview": "Live Preview (reduced resolution)",
         
         "download_original": "Download Original",
         "download_processed": "Download Processed",
@@ -152,6 +165,9 @@ T = {
         "reflection_axis": "Sumbu Refleksi",
         "reflection_opts": ["Horizontal (sumbu-x)", "Vertikal (sumbu-y)"],
         "btn_apply": "Terapkan Transformasi",
+        "chain_add": "➕ Tambah ke Rantai",
+        "chain_clear": "🧹 Hapus Rantai",
+        "chain_label": "Rantai (satu kali warp):",
         "conv_filter": "Pilih Filter",
         "conv_opts": ["Blur", "Tajamkan", "Deteksi Tepi", "Emboss"],
         "kernel_size": "Ukuran Kernel",
@@ -163,6 +179,8 @@ T = {
         "bg_w": "Lebar ROI",
         "bg_h": "Tinggi ROI",
         "bg_btn": "Hapus Background",
+        "bg_quality": "Kualitas / Kecepatan",
+        "bg_quality_opts": ["Resolusi penuh (paling lambat)", "Kualitas", "Seimbang", "Cepat"],
         "bg_save": "Simpan Hasil",
 
         "team_title": "👥 Tim Kami",
@@ -176,6 +194,8 @@ T = {
         "report_title": "Judul Laporan",
         "report_default": "Laporan Pemrosesan Citra Matriks",
         "report_btn": "Buat Laporan PDF",
+        "report_compress": "Kompres gambar (JPEG sesuai resolusi cetak)",
+        "report_dpi": "DPI Cetak",
         "report_error": "❗ Harap proses gambar terlebih dahulu sebelum membuat laporan",
         "report_download": "📥 Unduh Laporan PDF",
         "report_success": "✅ PDF Berhasil Dibuat!",
@@ -185,6 +205,7 @@ T = {
         "filtered_caption": "Hasil Filter 🎉",
         "bg_removed_caption": "Background Terhapus 🎉",
         "roi_preview": "Preview Seleksi ROI",
+        "live_preview": "Preview Langsung (resolusi rendah)",
         
         "download_original": "Unduh Asli",
         "download_processed": "Unduh Hasil",
@@ -209,6 +230,15 @@ if "transformation_params" not in st.session_state:
     st.session_state.transformation_params = {}
 if "filter_params" not in st.session_state:
     st.session_state.filter_params = {}
+if "transform_chain" not in st.session_state:
+    st.session_state.transform_chain = []
+if "upload_cache" not in st.session_state:
+    st.session_state.upload_cache = {}
+if "perf_recorder" not in st.session_state:
+    st.session_state.perf_recorder = StageRecorder()
+
+# Stages of this run (decode, warp, filter, ...) go to the Performance panel
+use_recorder(st.session_state.perf_recorder).start_run()
 
 # ================== UTILITY FUNCTIONS ==================
 def safe_display_image(image_path, size=(150, 150)):
@@ -225,17 +255,60 @@ def safe_display_image(image_path, size=(150, 150)):
         st.error(f"Error loading image: {str(e)}")
         return Image.new('RGB', size, color='lightgray')
 
-def create_download_button(image, filename, label):
-    """Create a download button for images"""
+@timed("png_encode")
+def encode_png(image):
+    """Encode a PIL image as PNG bytes"""
     from io import BytesIO
     
+    buf = BytesIO()
+    if image.mode == 'RGBA':
+        image = image.convert('RGB')
+    image.save(buf, format="PNG")
+    return buf.getvalue()
+
+@st.cache_resource
+def get_result_cache():
+    """Result cache shared by all sessions of this server process"""
+    return ResultCache(
+        max_bytes=int(os.environ.get("IMAGE_CACHE_MB", "512")) * 1024 * 1024,
+        disk_dir=os.environ.get("IMAGE_CACHE_DIR") or None,
+    )
+
+def load_upload(uploaded_file, slot):
+    """Decode an upload once and keep a downscaled proxy for live previews
+    
+    Sliders rerun the script; the full-resolution array is only used on Apply.
+    Decoded arrays are shared across sessions through the result cache.
+    """
+    # file_id changes with every upload, even for a different file with the same name and size
+    key = uploaded_file.file_id
+    cached = st.session_state.upload_cache.get(slot)
+    if cached is None or cached["key"] != key:
+        cache = get_result_cache()
+        data = uploaded_file.getvalue()
+        image_hash = content_hash(data)
+        with stage("decode"):
+            # Memory only: a full-resolution decode is cheaper to redo than to write to disk
+            array = cache.get_or_compute(
+                make_key(image_hash, "decode"),
+                lambda: np.array(Image.open(uploaded_file).convert('RGB')),
+                disk=False
+            )
+            proxy = cache.get_or_compute(make_key(image_hash, "proxy"), lambda: make_proxy(array)[0], disk=False)
+        scale = proxy.shape[1] / float(array.shape[1])
+        cached = {
+            "key": key, "hash": image_hash, "image": Image.fromarray(array), "array": array,
+            "proxy": proxy, "scale": scale, "png": None,
+        }
+        st.session_state.upload_cache[slot] = cached
+    return cached
+
+def create_download_button(image, filename, label, byte_im=None):
+    """Create a download button for images"""
     if image is not None:
         # Convert PIL Image to bytes
-        buf = BytesIO()
-        if image.mode == 'RGBA':
-            image = image.convert('RGB')
-        image.save(buf, format="PNG")
-        byte_im = buf.getvalue()
+        if byte_im is None:
+            byte_im = encode_png(image)
         
         return st.download_button(
             label=label,
@@ -245,202 +318,6 @@ def create_download_button(image, filename, label):
         )
     return None
 
-# ================== MATRIX TRANSFORMATION FUNCTIONS ==================
-def translation_matrix(tx, ty):
-    """Create translation matrix"""
-    return np.float32([[1, 0, tx], [0, 1, ty]])
-
-def scaling_matrix(sx, sy):
-    """Create scaling matrix"""
-    return np.float32([[sx, 0, 0], [0, sy, 0]])
-
-def rotation_matrix(angle, cx=None, cy=None):
-    """Create rotation matrix"""
-    r = radians(angle)
-    if cx is None or cy is None:
-        return np.float32([[cos(r), -sin(r), 0], [sin(r), cos(r), 0]])
-    else:
-        return np.float32([
-            [cos(r), -sin(r), cx - cos(r) * cx + sin(r) * cy],
-            [sin(r), cos(r), cy - sin(r) * cx - cos(r) * cy]
-        ])
-
-def shearing_matrix(shx, shy):
-    """Create shearing matrix"""
-    return np.float32([[1, shx, 0], [shy, 1, 0]])
-
-def reflection_matrix(axis):
-    """Create reflection matrix"""
-    if "Horizontal" in axis or "x" in axis.lower():
-        return np.float32([[1, 0, 0], [0, -1, 0]])
-    else:
-        return np.float32([[-1, 0, 0], [0, 1, 0]])
-
-def apply_affine_transform(img, M):
-    """Apply affine transformation to image"""
-    h, w = img.shape[:2]
-    
-    # Calculate output dimensions
-    corners = np.float32([[0, 0], [w, 0], [0, h], [w, h]])
-    ones = np.ones((4, 1), dtype=np.float32)
-    corners_homogeneous = np.hstack([corners, ones])
-    
-    # Apply transformation
-    M_homogeneous = np.vstack([M, [0, 0, 1]])
-    transformed_corners = (M_homogeneous @ corners_homogeneous.T).T
-    
-    # Calculate new dimensions
-    min_x, max_x = int(transformed_corners[:, 0].min()), int(transformed_corners[:, 0].max())
-    min_y, max_y = int(transformed_corners[:, 1].min()), int(transformed_corners[:, 1].max())
-    new_w, new_h = max_x - min_x, max_y - min_y
-    
-    # Adjust matrix for positive coordinates
-    shift = np.float32([[1, 0, -min_x], [0, 1, -min_y]])
-    shift_3x3 = np.vstack([shift, [0, 0, 1]])
-    combined = shift_3x3 @ M_homogeneous
-    M_final = combined[:2, :]
-    
-    # Apply warp affine
-    result = cv2.warpAffine(img, M_final, (new_w, new_h))
-    return result
-
-# ================== CONVOLUTION FILTERS ==================
-def get_convolution_kernel(filter_name, kernel_size=3):
-    """Get convolution kernel based on filter name"""
-    if kernel_size == 3:
-        kernels = {
-            "Blur": np.ones((3, 3), dtype=np.float32) / 9.0,
-            "Sharpen": np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32),
-            "Edge Detection": np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32),
-            "Emboss": np.array([[-2, -1, 0], [-1, 1, 1], [0, 1, 2]], dtype=np.float32),
-            "Tajamkan": np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32),
-            "Deteksi Tepi": np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32),
-        }
-    else:  # 5x5 kernel
-        kernels = {
-            "Blur": np.ones((5, 5), dtype=np.float32) / 25.0,
-            "Sharpen": np.array([
-                [-1, -1, -1, -1, -1],
-                [-1, -1, -1, -1, -1],
-                [-1, -1, 25, -1, -1],
-                [-1, -1, -1, -1, -1],
-                [-1, -1, -1, -1, -1]
-            ], dtype=np.float32),
-            "Edge Detection": np.array([
-                [-1, -1, -1, -1, -1],
-                [-1, -1, -1, -1, -1],
-                [-1, -1, 24, -1, -1],
-                [-1, -1, -1, -1, -1],
-                [-1, -1, -1, -1, -1]
-            ], dtype=np.float32),
-        }
-    
-    return kernels.get(filter_name, kernels["Blur"])
-
-# ================== BACKGROUND REMOVAL ==================
-def remove_background_grabcut(image_array, x, y, w, h, iterations=5):
-    """Remove background using GrabCut algorithm"""
-    try:
-        img = image_array.copy()
-        height, width = img.shape[:2]
-        
-        # Ensure ROI is within image bounds
-        x = max(0, min(x, width - 1))
-        y = max(0, min(y, height - 1))
-        w = max(10, min(w, width - x))
-        h = max(10, min(h, height - y))
-        
-        # Initialize mask
-        mask = np.zeros((height, width), np.uint8)
-        
-        # Background and foreground models
-        bgd_model = np.zeros((1, 65), np.float64)
-        fgd_model = np.zeros((1, 65), np.float64)
-        
-        # Apply GrabCut with rectangle initialization
-        cv2.grabCut(img, mask, (x, y, w, h), bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_RECT)
-        
-        # Create binary mask: 0 for background, 1 for foreground
-        mask2 = np.where((mask == 2) | (mask == 0), 0, 1).astype('uint8')
-        
-        # Apply mask to image
-        result = img * mask2[:, :, np.newaxis]
-        
-        # Create transparent background (RGBA)
-        rgba = cv2.cvtColor(result, cv2.COLOR_RGB2RGBA)
-        rgba[:, :, 3] = mask2 * 255
-        
-        return rgba
-    except Exception as e:
-        st.error(f"Error in background removal: {str(e)}")
-        return None
-
-# ================== PDF REPORT GENERATION ==================
-def generate_pdf_report(title, original_img, processed_img, params=None):
-    """Generate PDF report with images and parameters"""
-    try:
-        # Create temporary file for PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        temp_path = temp_file.name
-        temp_file.close()
-        
-        # Create PDF canvas
-        c = canvas.Canvas(temp_path, pagesize=A4)
-        width, height = A4
-        
-        # Set title
-        c.setFont("Helvetica-Bold", 20)
-        c.drawString(50, height - 50, title)
-        
-        # Add timestamp
-        from datetime import datetime
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        c.setFont("Helvetica", 10)
-        c.drawString(50, height - 70, f"Generated on: {timestamp}")
-        
-        # Save temporary images
-        temp_orig = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-        temp_proc = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-        
-        original_img.save(temp_orig.name)
-        processed_img.save(temp_proc.name)
-        
-        # Add images to PDF
-        c.drawString(50, height - 100, "Original Image:")
-        try:
-            c.drawImage(temp_orig.name, 50, height - 300, 200, 200)
-        except:
-            pass
-        
-        c.drawString(300, height - 100, "Processed Image:")
-        try:
-            c.drawImage(temp_proc.name, 300, height - 300, 200, 200)
-        except:
-            pass
-        
-        # Add parameters if available
-        if params:
-            c.drawString(50, height - 320, "Processing Parameters:")
-            y_pos = height - 340
-            for key, value in params.items():
-                c.drawString(60, y_pos, f"- {key}: {value}")
-                y_pos -= 20
-        
-        # Add footer
-        c.setFont("Helvetica-Oblique", 8)
-        c.drawString(50, 30, "Generated by Matrix Image Processing App")
-        
-        c.save()
-        
-        # Clean up temporary image files
-        os.unlink(temp_orig.name)
-        os.unlink(temp_proc.name)
-        
-        return temp_path
-    except Exception as e:
-        st.error(f"Error generating PDF: {str(e)}")
-        return None
-
 # ================== HOME PAGE ==================
 if page == t["nav"][0]:
     st.markdown(f"<h1 style='text-align: center;'>{t['home_title']}</h1>", unsafe_allow_html=True)
@@ -491,21 +368,31 @@ elif page == t["nav"][1]:
     
     if uploaded_file is not None:
         try:
-            # Load and display original image
-            original_image = Image.open(uploaded_file).convert('RGB')
-            original_array = np.array(original_image)
+            # Load and display original image (decoded once per upload)
+            upload = load_upload(uploaded_file, "image")
+            original_image = upload["image"]
+            original_array = upload["array"]
+            
+            # Chained steps belong to the image they were built on
+            if st.session_state.get("transform_chain_hash") != upload["hash"]:
+                st.session_state.transform_chain_hash = upload["hash"]
+                st.session_state.transform_chain = []
+            proxy_array, proxy_scale = upload["proxy"], upload["scale"]
             
             st.session_state.original_image = original_image
             
             col1, col2 = st.columns(2)
             with col1:
-                st.image(original_image, caption=t["orig_caption"], use_column_width=True)
+                st.image(proxy_array, caption=t["orig_caption"], use_column_width=True)
                 
-                # Download button for original
+                # Download button for original (PNG encoded once per upload)
+                if upload["png"] is None:
+                    upload["png"] = encode_png(original_image)
                 create_download_button(
                     original_image, 
                     "original_image.png", 
-                    t["download_original"]
+                    t["download_original"],
+                    byte_im=upload["png"]
                 )
             
             # Tool selection
@@ -577,11 +464,48 @@ elif page == t["nav"][1]:
                     
                     M = reflection_matrix(axis)
                 
+                # Transform chain: earlier steps plus the current one are warped once
+                chain = st.session_state.transform_chain
+                chain_col1, chain_col2 = st.columns(2)
+                with chain_col1:
+                    if st.button(t["chain_add"]):
+                        chain.append((transform_type, M))
+                with chain_col2:
+                    if st.button(t["chain_clear"]):
+                        chain.clear()
+                
+                # The sliders are the pending step, unless they still show the step just added
+                steps = list(chain)
+                if not chain or chain[-1][0] != transform_type or not np.array_equal(chain[-1][1], M):
+                    steps.append((transform_type, M))
+                
+                if chain:
+                    chain_labels = [label for label, _ in steps]
+                    st.caption(f"{t['chain_label']} {' → '.join(chain_labels)}")
+                    params["Chain"] = " → ".join(chain_labels)
+                
+                # Live preview on the proxy; the full-resolution warp only runs on Apply
+                preview_stack = TransformStack([step_M for _, step_M in steps])
+                with stage("preview_warp"):
+                    preview_array = apply_affine_transform(proxy_array, proxy_matrix(preview_stack.composed(), proxy_scale))
+                with col2:
+                    st.image(
+                        preview_array,
+                        caption=t["live_preview"],
+                        use_column_width=True
+                    )
+                
                 # Apply transformation button
                 if st.button(t["btn_apply"], type="primary"):
                     with st.spinner("Applying transformation..."):
                         try:
-                            transformed_array = apply_affine_transform(original_array, M)
+                            stack = TransformStack([step_M for _, step_M in steps])
+                            M = stack.composed()
+                            with stage("warp"):
+                                transformed_array = get_result_cache().get_or_compute(
+                                    make_key(upload["hash"], "affine", M=M),
+                                    lambda: stack.apply(original_array)
+                                )
                             transformed_image = Image.fromarray(transformed_array)
                             st.session_state.processed_image = transformed_image
                             st.session_state.transformation_params = params
@@ -621,30 +545,44 @@ elif page == t["nav"][1]:
                 )
                 
                 # Kernel size selection
-                kernel_size = st.selectbox(
+                kernel_size = st.select_slider(
                     t["kernel_size"],
-                    [3, 5],
+                    options=list(range(3, 32, 2)),
+                    value=3,
                     format_func=lambda x: f"{x}x{x}"
                 )
                 
+                # Get kernel and pick separable / direct convolution
+                kernel = get_convolution_kernel(filter_name, kernel_size)
+                backend = select_convolution_backend(kernel)
+                
                 params = {
                     "Filter": filter_name,
-                    "Kernel Size": f"{kernel_size}x{kernel_size}"
+                    "Kernel Size": f"{kernel_size}x{kernel_size}",
+                    "Backend": backend
                 }
                 
-                # Get kernel
-                kernel = get_convolution_kernel(filter_name, kernel_size)
+                # Live preview on the proxy with a kernel of the same footprint
+                preview_kernel = get_convolution_kernel(filter_name, proxy_kernel_size(kernel_size, proxy_scale))
+                with stage("preview_filter"):
+                    preview_array = convolve_image(proxy_array, preview_kernel)
+                with col2:
+                    st.image(
+                        preview_array,
+                        caption=t["live_preview"],
+                        use_column_width=True
+                    )
                 
                 # Apply filter button
                 if st.button(t["btn_apply"], type="primary"):
                     with st.spinner(f"Applying {filter_name} filter..."):
                         try:
-                            # Convert PIL to OpenCV format
-                            if original_array.dtype != np.uint8:
-                                original_array = original_array.astype(np.uint8)
-                            
                             # Apply convolution
-                            filtered_array = cv2.filter2D(original_array, -1, kernel)
+                            with stage("filter"):
+                                filtered_array = get_result_cache().get_or_compute(
+                                    make_key(upload["hash"], "filter", kernel=kernel, backend=backend),
+                                    lambda: convolve_image(original_array, kernel, backend)
+                                )
                             filtered_image = Image.fromarray(filtered_array)
                             st.session_state.processed_image = filtered_image
                             st.session_state.filter_params = params
@@ -689,9 +627,11 @@ elif page == t["nav"][2]:
     
     if bg_file is not None:
         try:
-            # Load image
-            bg_image = Image.open(bg_file).convert('RGB')
-            bg_array = np.array(bg_image)
+            # Load image (decoded once per upload)
+            upload = load_upload(bg_file, "background")
+            bg_image = upload["image"]
+            bg_array = upload["array"]
+            proxy_array, proxy_scale = upload["proxy"], upload["scale"]
             h, w = bg_array.shape[:2]
             
             st.session_state.original_image = bg_image
@@ -699,16 +639,13 @@ elif page == t["nav"][2]:
             col1, col2 = st.columns(2)
             
             with col1:
-                st.image(bg_image, caption=t["orig_caption"], use_column_width=True)
+                st.image(proxy_array, caption=t["orig_caption"], use_column_width=True)
             
             with col2:
                 st.subheader("🎯 Select Region of Interest (ROI)")
                 
                 # Default ROI values (centered)
-                default_x = max(0, int(w * 0.1))
-                default_y = max(0, int(h * 0.1))
-                default_w = min(int(w * 0.8), w - default_x)
-                default_h = min(int(h * 0.8), h - default_y)
+                default_x, default_y, default_w, default_h = default_roi(w, h)
                 
                 # ROI sliders
                 x = st.slider(t["bg_x"], 0, w-1, default_x, key="roi_x")
@@ -716,16 +653,29 @@ elif page == t["nav"][2]:
                 roi_w = st.slider(t["bg_w"], 10, w-x, default_w, key="roi_w")
                 roi_h = st.slider(t["bg_h"], 10, h-y, default_h, key="roi_h")
                 
-                # Show ROI preview
-                preview_img = bg_array.copy()
-                cv2.rectangle(preview_img, (x, y), (x+roi_w, y+roi_h), (0, 255, 0), 3)
+                # Quality vs speed: full resolution or multi-resolution GrabCut
+                bg_quality = st.selectbox(
+                    t["bg_quality"],
+                    t["bg_quality_opts"],
+                    index=2
+                )
+                grabcut_preset = [None, "quality", "balanced", "fast"][t["bg_quality_opts"].index(bg_quality)]
+                
+                # Show ROI preview on the proxy instead of copying the full array
+                preview_img = draw_roi_preview(proxy_array, x, y, roi_w, roi_h, proxy_scale)
                 st.image(preview_img, caption=t["roi_preview"], use_column_width=True)
             
             # Remove background button
             if st.button(t["bg_btn"], type="primary"):
                 with st.spinner("Removing background..."):
                     try:
-                        result_array = remove_background_grabcut(bg_array, x, y, roi_w, roi_h)
+                        with stage("grabcut"):
+                            result_array = get_result_cache().get_or_compute(
+                                make_key(upload["hash"], "grabcut", roi=(x, y, roi_w, roi_h), preset=grabcut_preset),
+                                lambda: remove_background_grabcut(
+                                    bg_array, x, y, roi_w, roi_h, preset=grabcut_preset
+                                )
+                            )
                         
                         if result_array is not None:
                             result_image = Image.fromarray(result_array)
@@ -904,34 +854,33 @@ elif page == t["nav"][4]:
         report_params["Theme"] = theme
         report_params["Original Image Size"] = f"{st.session_state.original_image.size[0]}x{st.session_state.original_image.size[1]}"
         
+        # Embed print-resolution JPEGs instead of full-resolution PNGs
+        report_compress = st.checkbox(t["report_compress"], value=True)
+        report_dpi = st.select_slider(t["report_dpi"], options=[72, 150, 300], value=150)
+        
         # Generate PDF button
         if st.button(t["report_btn"], type="primary"):
             with st.spinner("Generating PDF report..."):
                 try:
-                    pdf_path = generate_pdf_report(
-                        report_title,
-                        st.session_state.original_image,
-                        st.session_state.processed_image,
-                        report_params
+                    with stage("pdf_build"):
+                        pdf_bytes = generate_pdf_report(
+                            report_title,
+                            st.session_state.original_image,
+                            st.session_state.processed_image,
+                            report_params,
+                            embed_jpeg=report_compress,
+                            dpi=report_dpi
+                        )
+                    
+                    # Create download button
+                    st.download_button(
+                        label=t["report_download"],
+                        data=pdf_bytes,
+                        file_name=f"{report_title.replace(' ', '_')}.pdf",
+                        mime="application/pdf"
                     )
                     
-                    if pdf_path:
-                        # Read PDF file
-                        with open(pdf_path, 'rb') as f:
-                            pdf_bytes = f.read()
-                        
-                        # Create download button
-                        st.download_button(
-                            label=t["report_download"],
-                            data=pdf_bytes,
-                            file_name=f"{report_title.replace(' ', '_')}.pdf",
-                            mime="application/pdf"
-                        )
-                        
-                        st.success(t["report_success"])
-                        
-                        # Clean up temporary file
-                        os.unlink(pdf_path)
+                    st.success(t["report_success"])
                     
                 except Exception as e:
                     st.error(f"Error generating report: {str(e)}")
@@ -947,6 +896,21 @@ st.sidebar.write(f"**Language:** {lang}")
 st.sidebar.write(f"**Theme:** {theme}")
 st.sidebar.write(f"**Page:** {page}")
 
+# Per-stage timings of this session (wall, CPU, allocations) with JSON lines / Prometheus export
+sidebar_panel(st, st.session_state.perf_recorder)
+
+# Result cache counters (shared by all sessions)
+cache_stats = get_result_cache().stats()
+st.sidebar.markdown("### 🗄 Cache")
+st.sidebar.write(
+    f"**Hits:** {cache_stats['hits']} (+{cache_stats['disk_hits']} disk) · "
+    f"**Misses:** {cache_stats['misses']} · **Evictions:** {cache_stats['evictions']}"
+)
+st.sidebar.write(
+    f"**Entries:** {cache_stats['entries']} · "
+    f"**Used:** {cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB"
+)
+
 # Add a reset button in sidebar
 if st.sidebar.button("🔄 Reset Session"):
     for key in list(st.session_state.keys()):
@@ -0,0 +1,235 @@
+"""Headless batch runner for the image pipeline (transform, filter, background removal)
+
+Example:
+    python batch_engine.py "photos/*.jpg" --pipeline pipeline.json --out results/
+
+The pipeline spec is a JSON list of steps, applied in order:
+    [
+        {"op": "transform", "type": "rotation", "angle": 30},
+        {"op": "filter", "name": "Blur", "kernel_size": 5},
+        {"op": "grabcut", "x": 40, "y": 40, "w": 400, "h": 300, "preset": "balanced"}
+    ]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from image_engine import (
+    load_image, save_image,
+    translation_matrix, scaling_matrix, rotation_matrix, shearing_matrix,
+    reflection_matrix, TransformStack, apply_convolution_filter,
+    remove_background_grabcut, default_roi,
+)
+from batch_report import BatchReportBuilder, thumbnail_pair
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+# ================== PIPELINE SPEC ==================
+def load_pipeline(spec):
+    """Load a pipeline spec from a JSON file path or an inline JSON string"""
+    if os.path.exists(spec):
+        with open(spec, 'r', encoding='utf-8') as f:
+            steps = json.load(f)
+    else:
+        steps = json.loads(spec)
+    if isinstance(steps, dict):
+        steps = [steps]
+    for step in steps:
+        if step.get("op") not in ("transform", "filter", "grabcut"):
+            raise ValueError(f"Unknown pipeline op: {step.get('op')!r}")
+    return steps
+
+def build_transform_matrix(step, shape):
+    """Build the 2x3 matrix for a transform step, matching the UI defaults"""
+    kind = step.get("type", "translation").lower()
+    h, w = shape[:2]
+    if kind == "translation":
+        return translation_matrix(step.get("tx", 50), step.get("ty", 30))
+    if kind == "scaling":
+        return scaling_matrix(step.get("sx", 1.2), step.get("sy", 1.2))
+    if kind == "rotation":
+        return rotation_matrix(step.get("angle", 45), w / 2, h / 2)
+    if kind == "shearing":
+        return shearing_matrix(step.get("shx", 0.3), step.get("shy", 0.0))
+    if kind == "reflection":
+        return reflection_matrix(step.get("axis", "Horizontal (x-axis)"))
+    raise ValueError(f"Unknown transform type: {kind!r}")
+
+def run_pipeline(image_array, steps):
+    """Run every step of the pipeline on one image array
+
+    Consecutive transform steps are fused into one warp via TransformStack.
+    """
+    result = image_array
+    stack = TransformStack()
+    for step in steps:
+        op = step["op"]
+        if op == "transform":
+            stack.push(build_transform_matrix(step, result.shape))
+            continue
+        if len(stack):
+            result = stack.apply(result)
+            stack.clear()
+        if op == "filter":
+            result = apply_convolution_filter(
+                result, step.get("name", "Blur"), step.get("kernel_size", 3)
+            )
+        else:
+            if result.ndim == 3 and result.shape[2] == 4:
+                result = result[:, :, :3]
+            height, width = result.shape[:2]
+            x, y, w, h = default_roi(width, height)
+            result = remove_background_grabcut(
+                result,
+                step.get("x", x), step.get("y", y),
+                step.get("w", w), step.get("h", h),
+                step.get("iterations", 5),
+                preset=step.get("preset"),
+            )
+    if len(stack):
+        result = stack.apply(result)
+    return result
+
+# ================== BATCH EXECUTION ==================
+def collect_inputs(patterns):
+    """Expand directories and glob patterns into a sorted list of image paths"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.add(os.path.join(pattern, name))
+        else:
+            for path in glob.glob(pattern, recursive=True):
+                if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.add(path)
+    return sorted(paths)
+
+def output_paths(paths, out_dir):
+    """Map each input to a PNG under out_dir, keeping its path relative to the inputs' common folder
+
+    Raises ValueError when two inputs would write the same file
+    (e.g. photo.jpg and photo.png in one folder).
+    """
+    if not paths:
+        return {}
+    dirs = [os.path.dirname(os.path.abspath(p)) for p in paths]
+    root = os.path.commonpath(dirs)
+    mapping, owners = {}, {}
+    for path in paths:
+        rel = os.path.relpath(os.path.abspath(path), root)
+        out_path = os.path.join(out_dir, os.path.splitext(rel)[0] + ".png")
+        key = os.path.normcase(out_path)
+        if key in owners:
+            raise ValueError(f"{owners[key]} and {path} would both be written to {out_path}")
+        owners[key] = path
+        mapping[path] = out_path
+    return mapping
+
+def _init_worker():
+    # One OpenCV thread per process, otherwise N workers x N threads oversubscribe the cores
+    cv2.setNumThreads(1)
+
+def process_file(path, steps, out_path, thumbnails=False):
+    """Process one file and write the result as PNG to out_path
+
+    Returns (path, out_path, seconds, error, thumbs); thumbs holds report-sized
+    JPEG thumbnails of the original and result when requested, else None.
+    """
+    start = time.perf_counter()
+    try:
+        original = load_image(path)
+        result = run_pipeline(original, steps)
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        save_image(result, out_path)
+        seconds = time.perf_counter() - start
+        thumbs = thumbnail_pair(original, result) if thumbnails else None
+        return path, out_path, seconds, None, thumbs
+    except Exception as e:
+        return path, None, time.perf_counter() - start, str(e), None
+
+def run_batch(paths, steps, out_dir, workers=None, on_result=None, thumbnails=False):
+    """Process all paths in a process pool sized to the core count and return a summary"""
+    targets = output_paths(paths, out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(process_file, path, steps, targets[path], thumbnails) for path in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            if on_result is not None:
+                on_result(result)
+            # Thumbnails are only needed by the callback; don't keep them around
+            results.append(result[:4])
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if r[3] is not None]
+    return {
+        "images": len(results),
+        "failed": len(failed),
+        "workers": workers,
+        "seconds": elapsed,
+        "images_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+        "results": results,
+    }
+
+# ================== CLI ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the image pipeline over many images")
+    parser.add_argument("inputs", nargs="+", help="Image files, directories or glob patterns")
+    parser.add_argument("--pipeline", required=True, help="Pipeline spec: JSON file or inline JSON")
+    parser.add_argument("--out", default="batch_output", help="Output directory")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--report", default=None, help="Write a multi-page PDF QA report to this path")
+    args = parser.parse_args(argv)
+
+    steps = load_pipeline(args.pipeline)
+    paths = collect_inputs(args.inputs)
+    if not paths:
+        print("No input images found", file=sys.stderr)
+        return 1
+
+    try:
+        output_paths(paths, args.out)
+    except ValueError as e:
+        print(f"Output name clash: {e}", file=sys.stderr)
+        return 1
+
+    pdf = BatchReportBuilder(args.report, "Batch Processing Report") if args.report else None
+    step_params = {
+        f"Step {i + 1}": ", ".join(f"{k}={v}" for k, v in step.items())
+        for i, step in enumerate(steps)
+    }
+
+    def report(result):
+        path, out_path, seconds, error, thumbs = result
+        if error:
+            print(f"FAILED {path}: {error}", file=sys.stderr)
+        else:
+            print(f"{path} -> {out_path} ({seconds:.2f}s)")
+        if pdf is not None:
+            original, processed = thumbs if thumbs else (None, None)
+            pdf.add_result(os.path.basename(path), original, processed, step_params, seconds, error)
+
+    summary = run_batch(paths, steps, args.out, args.workers, on_result=report, thumbnails=pdf is not None)
+    if pdf is not None:
+        pdf.finish()
+        print(f"Report written to {args.report}")
+    print(
+        f"Processed {summary['images']} images ({summary['failed']} failed) "
+        f"in {summary['seconds']:.2f}s with {summary['workers']} workers: "
+        f"{summary['images_per_second']:.2f} images/sec"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+"""Streaming multi-page PDF report for many processed images
+
+Entries are drawn onto the reportlab canvas as results arrive; only the
+compressed thumbnails end up in the document, never the source images.
+Each distinct image is embedded once as a form XObject and reused.
+
+Example:
+    with BatchReportBuilder("qa_report.pdf", "Nightly QA") as report:
+        for name, original, processed, params, seconds in results:
+            report.add_result(name, original, processed, params, seconds)
+"""
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+
+from image_engine import jpeg_thumbnail
+from image_cache import content_hash
+
+PAGE_MARGIN = 40
+ENTRY_HEIGHT = 170
+THUMB_BOX = 140  # points
+
+
+class BatchReportBuilder:
+    """Incremental multi-page report: thumbnails, parameter table and timing per image"""
+
+    def __init__(self, out, title="Batch Processing Report", dpi=150, jpeg_quality=80):
+        from reportlab.pdfgen import canvas
+        from reportlab.lib.pagesizes import A4
+
+        self.out = out
+        self.title = title
+        self.thumb_px = int(np.ceil(THUMB_BOX * dpi / 72.0))
+        self.jpeg_quality = jpeg_quality
+        self.page_width, self.page_height = A4
+        self.canvas = canvas.Canvas(out, pagesize=A4)
+        self.canvas.setTitle(title)
+        self._forms = {}  # content hash -> (form name, width, height)
+        self._y = None
+        self._page = 0
+        self.count = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+        self._slowest = []  # (seconds, name), at most 10
+        self.started = datetime.now()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish()
+        return False
+
+    # ---------- layout ----------
+    def _new_page(self):
+        c = self.canvas
+        if self._page:
+            self._draw_footer()
+            c.showPage()
+        self._page += 1
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(PAGE_MARGIN, self.page_height - PAGE_MARGIN, self.title)
+        c.setFont("Helvetica", 8)
+        c.drawRightString(
+            self.page_width - PAGE_MARGIN, self.page_height - PAGE_MARGIN,
+            f"Generated on: {self.started.strftime('%Y-%m-%d %H:%M:%S')}"
+        )
+        self._y = self.page_height - PAGE_MARGIN - 20
+
+    def _draw_footer(self):
+        c = self.canvas
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(PAGE_MARGIN, 25, "Generated by Matrix Image Processing App")
+        c.drawRightString(self.page_width - PAGE_MARGIN, 25, f"Page {self._page}")
+
+    def _ensure_space(self, height):
+        if self._y is None or self._y - height < PAGE_MARGIN + 20:
+            self._new_page()
+
+    # ---------- images ----------
+    def _image_form(self, image):
+        """Form XObject for an image; the same content is only embedded once"""
+        if isinstance(image, (bytes, bytearray)):
+            key = content_hash(bytes(image))
+        else:
+            array = image if isinstance(image, np.ndarray) else np.asarray(image)
+            key = content_hash(array)
+        if key in self._forms:
+            return self._forms[key]
+
+        from reportlab.lib.utils import ImageReader
+
+        # bytes are taken as an already encoded (e.g. JPEG) thumbnail
+        data = bytes(image) if isinstance(image, (bytes, bytearray)) else jpeg_thumbnail(
+            image, self.thumb_px, self.jpeg_quality
+        )
+        reader = ImageReader(BytesIO(data))
+        px_w, px_h = reader.getSize()
+        scale = THUMB_BOX / float(max(px_w, px_h))
+        w, h = px_w * scale, px_h * scale
+
+        name = f"img{len(self._forms)}"
+        c = self.canvas
+        c.beginForm(name, lowerx=0, lowery=0, upperx=w, uppery=h)
+        c.drawImage(reader, 0, 0, w, h)
+        c.endForm()
+        self._forms[key] = (name, w, h)
+        return self._forms[key]
+
+    def _draw_image(self, image, x, y_top):
+        name, w, h = self._image_form(image)
+        c = self.canvas
+        c.saveState()
+        # Centre the thumbnail in its box
+        c.translate(x + (THUMB_BOX - w) / 2, y_top - THUMB_BOX + (THUMB_BOX - h) / 2)
+        c.doForm(name)
+        c.restoreState()
+
+    # ---------- public API ----------
+    def add_result(self, name, original, processed=None, params=None, seconds=None, error=None):
+        """Add one image entry; originals/processed may be PIL images, arrays or JPEG bytes"""
+        self._ensure_space(ENTRY_HEIGHT)
+        c = self.canvas
+        top = self._y
+
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(PAGE_MARGIN, top, str(name))
+        c.setFont("Helvetica", 9)
+        if seconds is not None:
+            c.drawRightString(self.page_width - PAGE_MARGIN, top, f"{seconds:.3f} s")
+
+        image_top = top - 8
+        if original is not None:
+            self._draw_image(original, PAGE_MARGIN, image_top)
+        if processed is not None:
+            self._draw_image(processed, PAGE_MARGIN + THUMB_BOX + 10, image_top)
+
+        # Parameter table to the right of the thumbnails
+        text_x = PAGE_MARGIN + 2 * THUMB_BOX + 25
+        text_y = image_top - 10
+        c.setFont("Helvetica", 8)
+        rows = list((params or {}).items())
+        if error:
+            rows.insert(0, ("Error", error))
+        for key, value in rows[:14]:
+            line = f"{key}: {value}"
+            c.drawString(text_x, text_y, line if len(line) <= 60 else line[:57] + "...")
+            text_y -= 10
+
+        c.setLineWidth(0.3)
+        c.line(PAGE_MARGIN, top - ENTRY_HEIGHT + 8, self.page_width - PAGE_MARGIN, top - ENTRY_HEIGHT + 8)
+        self._y = top - ENTRY_HEIGHT
+
+        self.count += 1
+        if error:
+            self.failed += 1
+        if seconds is not None:
+            self.total_seconds += seconds
+            self._slowest = sorted(self._slowest + [(seconds, str(name))], reverse=True)[:10]
+
+    def finish(self):
+        """Write the summary page and close the document"""
+        if self.canvas is None:
+            return self.out
+        if self._page:
+            self._draw_footer()
+            self.canvas.showPage()
+        self._page += 1
+
+        c = self.canvas
+        y = self.page_height - PAGE_MARGIN
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(PAGE_MARGIN, y, f"{self.title} - Summary")
+        c.setFont("Helvetica", 10)
+        mean = self.total_seconds / self.count if self.count else 0.0
+        lines = [
+            f"Images: {self.count}",
+            f"Failed: {self.failed}",
+            f"Distinct images embedded: {len(self._forms)}",
+            f"Total processing time: {self.total_seconds:.2f} s",
+            f"Mean time per image: {mean:.3f} s",
+            "",
+            "Slowest images:",
+        ] + [f"  {seconds:.3f} s  {name}" for seconds, name in self._slowest]
+        for line in lines:
+            y -= 16
+            c.drawString(PAGE_MARGIN, y, line)
+        self._draw_footer()
+        c.save()
+        self.canvas = None
+        return self.out
+
+
+def thumbnail_pair(original, processed, dpi=150, quality=80):
+    """JPEG thumbnails sized for the report, cheap to send back from worker processes"""
+    max_px = int(np.ceil(THUMB_BOX * dpi / 72.0))
+    return jpeg_thumbnail(original, max_px, quality), jpeg_thumbnail(processed, max_px, quality)
@@ -0,0 +1,34 @@
+"""Baseline comparison shared by the benchmark scripts"""
+import json
+
+
+def load_results(path):
+    """The {"meta": ..., "results": [...]} document written by a benchmark run"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline_results, columns, value, tolerance, fmt=".3f"):
+    """Print the slowdown per result against the matching baseline entry; returns the regressions
+
+    columns are (field, format spec) pairs that identify a result, e.g.
+    [("size", "<8"), ("op", "<30")]; value is the timing field compared.
+    Regressions are (*key, ratio) tuples for ratios above 1 + tolerance.
+    """
+    fields = [field for field, _ in columns]
+    baseline = {tuple(r[f] for f in fields): r for r in baseline_results}
+    header = " ".join(f"{field:{spec}}" for field, spec in columns)
+    print(f"\n{header}{'baseline':>10}{'now':>10}{'ratio':>8}")
+    regressions = []
+    for r in results:
+        key = tuple(r[f] for f in fields)
+        base = baseline.get(key)
+        if base is None or not base[value]:
+            continue
+        ratio = r[value] / base[value]
+        flag = " REGRESSION" if ratio > 1 + tolerance else ""
+        label = " ".join(f"{r[field]:{spec}}" for field, spec in columns)
+        print(f"{label}{base[value]:>10{fmt}}{r[value]:>10{fmt}}{ratio:>7.2f}x{flag}")
+        if flag:
+            regressions.append(key + (ratio,))
+    return regressions
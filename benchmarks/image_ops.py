@@ -0,0 +1,232 @@
+"""Benchmark and regression check for the image operations behind analisis_main.py
+
+Runs each operation over a fixed corpus of synthetic images (VGA up to
+50 MP) and reports latency percentiles, megapixels per second and peak
+RSS per operation and size. Results go to JSON; a previous result file
+can serve as the baseline for --compare, which exits 1 when an
+operation's median latency got slower than the tolerance.
+
+benchmarks/image_baseline.json is the committed baseline over every size
+(--repeats 3 --max-seconds 10). Its "meta" block records the machine it
+came from. Regenerate it on the hardware you compare on.
+
+Example:
+    python benchmarks/image_ops.py --repeats 3 --max-seconds 10 --out benchmarks/image_baseline.json
+    python benchmarks/image_ops.py --sizes VGA FHD 12MP --compare benchmarks/image_baseline.json --tolerance 0.2
+    python benchmarks/image_ops.py --ops filter2d --kernel-sizes 3 15 31
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+
+import numpy as np
+import cv2
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import load_results, compare as compare_results  # noqa: E402
+from image_engine import (  # noqa: E402
+    apply_affine_transform, rotation_matrix, get_convolution_kernel, convolve_image,
+    remove_background_grabcut, default_roi, generate_pdf_report,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SIZES = {
+    "VGA": (640, 480),
+    "HD": (1280, 720),
+    "FHD": (1920, 1080),
+    "5MP": (2592, 1944),
+    "12MP": (4000, 3000),
+    "24MP": (6000, 4000),
+    "50MP": (8192, 6144),
+}
+KERNELS = ["Blur", "Sharpen", "Edge Detection", "Emboss"]
+
+
+# ================== CORPUS ==================
+def synthetic_image(width, height, seed=0):
+    """Deterministic RGB test image: gradients, a bright ellipse and sensor-like noise"""
+    rng = np.random.default_rng(seed)
+    img = np.empty((height, width, 3), dtype=np.uint8)
+    img[..., 0] = np.linspace(40, 200, width, dtype=np.float32).astype(np.uint8)[np.newaxis, :]
+    img[..., 1] = np.linspace(60, 180, height, dtype=np.float32).astype(np.uint8)[:, np.newaxis]
+    img[..., 2] = 110
+    cv2.ellipse(img, (width // 2, height // 2), (int(width * 0.28), int(height * 0.3)),
+                0, 0, 360, (210, 120, 90), -1)
+    noise = rng.integers(0, 24, size=img.shape, dtype=np.uint8)
+    return cv2.add(img, noise)
+
+
+def parse_size(name):
+    if name.upper() in SIZES:
+        return name.upper(), SIZES[name.upper()]
+    width, height = (int(v) for v in name.lower().split("x"))
+    return name, (width, height)
+
+
+# ================== MEASUREMENT ==================
+def reset_peak_rss():
+    """Reset the kernel's RSS high-water mark (Linux); False where not supported"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def measure(fn, repeats, warmup, max_seconds):
+    """Latencies of fn() (at least one run, stopping early past max_seconds) and peak RSS"""
+    per_op_rss = reset_peak_rss()
+    for _ in range(warmup):
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+        if seconds > max_seconds:
+            # Too slow to repeat: the warm-up run is the only sample
+            return np.array([seconds]), peak_rss_mb(), per_op_rss
+    per_op_rss = reset_peak_rss()
+    latencies = []
+    spent = 0.0
+    while len(latencies) < repeats and (not latencies or spent < max_seconds):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+        spent += latencies[-1]
+    return np.array(latencies), peak_rss_mb(), per_op_rss
+
+
+# ================== OPERATIONS ==================
+def png_bytes(pil_image):
+    """What create_download_button does with the processed image (see encode_png)"""
+    buf = BytesIO()
+    pil_image.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def operations(img, kernel_sizes, grabcut_full_max_mp, pdf_raw_max_mp):
+    """(name, callable) pairs for one image"""
+    height, width = img.shape[:2]
+    mp = width * height / 1e6
+    pil = Image.fromarray(img)
+    roi = default_roi(width, height)
+    M = rotation_matrix(30, width / 2, height / 2)
+
+    ops = [("affine_rotate", lambda: apply_affine_transform(img, M))]
+    for k in kernel_sizes:
+        for name in KERNELS:
+            kernel = get_convolution_kernel(name, k)
+            label = name.lower().replace(" ", "_")
+            ops.append((f"filter2d_{label}_{k}", lambda kernel=kernel: convolve_image(img, kernel, "direct")))
+            ops.append((f"convolve_auto_{label}_{k}", lambda kernel=kernel: convolve_image(img, kernel)))
+    ops.append(("grabcut_fast", lambda: remove_background_grabcut(img, *roi, preset="fast")))
+    if mp <= grabcut_full_max_mp:
+        ops.append(("grabcut_full", lambda: remove_background_grabcut(img, *roi)))
+    ops.append(("png_encode", lambda: png_bytes(pil)))
+    ops.append(("pdf_report_jpeg", lambda: generate_pdf_report("Benchmark", pil, pil, {"op": "bench"}, embed_jpeg=True)))
+    if mp <= pdf_raw_max_mp:
+        ops.append(("pdf_report_raw", lambda: generate_pdf_report("Benchmark", pil, pil, {"op": "bench"})))
+    return ops
+
+
+def run(sizes, args):
+    results = []
+    print(f"{'size':<8}{'operation':<30}{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}{'MP/s':>9}{'RSS MB':>9}")
+    for size_name, (width, height) in sizes:
+        img = synthetic_image(width, height)
+        mp = width * height / 1e6
+        for op, fn in operations(img, args.kernel_sizes, args.grabcut_full_max_mp, args.pdf_raw_max_mp):
+            if args.ops and not any(sel in op for sel in args.ops):
+                continue
+            latencies, rss, per_op_rss = measure(fn, args.repeats, args.warmup, args.max_seconds)
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+            results.append({
+                "size": size_name, "width": width, "height": height, "megapixels": mp, "op": op,
+                "repeats": len(latencies), "p50": p50, "p90": p90, "p99": p99,
+                "mean": float(latencies.mean()), "min": float(latencies.min()),
+                "mp_per_s": mp / p50 if p50 > 0 else None,
+                "peak_rss_mb": rss, "rss_scope": "operation" if per_op_rss else "process",
+            })
+            print(f"{size_name:<8}{op:<30}{p50:>9.4f}{p90:>9.4f}{p99:>9.4f}{mp / p50:>9.1f}"
+                  + (f"{rss:>9.0f}" if rss is not None else ""), flush=True)
+        del img
+    return results
+
+
+# ================== REPORTING ==================
+def metadata():
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "opencv_threads": cv2.getNumThreads(),
+        "numpy": np.__version__,
+    }
+
+
+def compare(results, baseline_path, tolerance):
+    """Median-latency ratio per (size, op) against the baseline; returns the regressions"""
+    baseline = load_results(baseline_path)["results"]
+    return compare_results(results, baseline, [("size", "<8"), ("op", "<30")], "p50", tolerance, ".4f")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", default=list(SIZES), help=f"Named sizes ({', '.join(SIZES)}) or WxH")
+    parser.add_argument("--ops", nargs="*", default=None, help="Only operations whose name contains one of these")
+    parser.add_argument("--kernel-sizes", nargs="+", type=int, default=[3, 15])
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="Stop repeating an operation after this long")
+    parser.add_argument("--grabcut-full-max-mp", type=float, default=0.5, help="Largest size for full-resolution GrabCut")
+    parser.add_argument("--pdf-raw-max-mp", type=float, default=12.0, help="Largest size for the uncompressed PDF report")
+    parser.add_argument("--threads", type=int, default=None, help="cv2.setNumThreads (default: OpenCV's choice)")
+    parser.add_argument("--out", default="image_benchmark.json", help="JSON results file (usable as a baseline)")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    results = run([parse_size(s) for s in args.sizes], args)
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} operation(s) slower than {1 + args.tolerance:.2f}x baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Benchmark the survey analysis pipeline on synthetic surveys
+
+Generates surveys with the real column layout (demographics "1."-"8.",
+Likert items "10."-"23." answered as "4 = Agree") and times each stage of
+the app: CSV load (cold and from the Parquet cache), Likert decoding,
+totals, descriptive statistics, frequency tables, qcut + crosstab, the
+scipy tests and the precomputed cube. Per-stage peak allocations come
+from tracemalloc, process peak RSS from getrusage. Results are written as
+JSON; --compare fails (exit 1) when a stage got slower than the tolerance.
+
+Example:
+    python benchmarks/survey_pipeline.py --rows 10000 1000000 10000000 --out survey_bench.json
+    python benchmarks/survey_pipeline.py --rows 1000000 --compare survey_bench.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_common import load_results, compare as compare_results  # noqa: E402
+from survey_io import load_survey_csv  # noqa: E402
+from survey_likert import decode_likert  # noqa: E402
+from survey_stats import describe_columns, frequency_tables  # noqa: E402
+from survey_cube import SurveyCube  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LIKERT_PREFIXES = [10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 22, 23]
+LIKERT_LABELS = np.array([
+    "1 = Strongly Disagree", "2 = Disagree", "3 = Neutral", "4 = Agree", "5 = Strongly Agree",
+], dtype=object)
+DEMOGRAPHICS = {
+    "1. Gender": ["Male", "Female"],
+    "3. Education Level": ["High School", "Diploma", "Bachelor", "Master", "Doctorate"],
+    "4. Employment Status": ["Student", "Employed", "Self-employed", "Unemployed"],
+    "5. Average Monthly Income": ["< 1 million", "1-3 million", "3-5 million", "> 5 million"],
+    "6. How often did you use digital payment methods (e-wallet, mobile banking, QRIS, etc.) in the past week?":
+        ["Never", "1-2 times", "3-5 times", "More than 5 times"],
+    "8. What do you primarily use digital payments for?":
+        ["Shopping", "Bills", "Transport", "Food", "Transfers"],
+}
+X_ITEMS = [f"{p}. X item {p}" for p in LIKERT_PREFIXES[:7]]
+Y_ITEMS = [f"{p}. Y item {p}" for p in LIKERT_PREFIXES[7:]]
+
+
+# ================== SYNTHETIC DATA ==================
+def synthetic_chunk(rows, rng, missing=0.01):
+    """One chunk of survey rows; X and Y items share a latent factor so they correlate"""
+    data = {}
+    for col, levels in DEMOGRAPHICS.items():
+        data[col] = np.asarray(levels, dtype=object)[rng.integers(0, len(levels), rows)]
+    data["2. Age (numeric)"] = rng.integers(17, 65, rows)
+    order = ["1. Gender", "2. Age (numeric)"] + list(DEMOGRAPHICS)[1:]
+    latent = rng.normal(size=rows)
+    for col in X_ITEMS + Y_ITEMS:
+        loading = 0.9 if col in X_ITEMS else 0.6
+        score = np.clip(np.round(3 + loading * latent + rng.normal(0, 0.9, rows)), 1, 5).astype(int)
+        answers = LIKERT_LABELS[score - 1]
+        answers[rng.random(rows) < missing] = None
+        data[col] = answers
+    return pd.DataFrame(data, columns=order + X_ITEMS + Y_ITEMS)
+
+
+def write_survey_csv(path, rows, seed=0, chunk_rows=500_000):
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        synthetic_chunk(n, rng).to_csv(path, mode="a" if written else "w", header=not written, index=False)
+        written += n
+    return path
+
+
+# ================== MEASUREMENT ==================
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+class StageTimer:
+    """Times stages and records their peak traced allocation"""
+
+    def __init__(self, rows, trace=True):
+        self.rows = rows
+        self.trace = trace
+        self.results = []
+
+    def run(self, stage, fn, *args, **kwargs):
+        if self.trace:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        value = fn(*args, **kwargs)
+        seconds = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        peak = (tracemalloc.get_traced_memory()[1] - base) / (1024 * 1024) if self.trace else None
+        self.results.append({
+            "rows": self.rows, "stage": stage, "seconds": seconds, "cpu_seconds": cpu,
+            "rows_per_second": self.rows / seconds if seconds > 0 else None,
+            "peak_alloc_mb": peak, "peak_rss_mb": peak_rss_mb(),
+        })
+        print(f"{self.rows:>10} {stage:<22}{seconds:>9.3f}s"
+              + (f"{peak:>10.1f} MB" if peak is not None else ""), flush=True)
+        return value
+
+
+def likert_regex(df_sub):
+    """Per-cell regex decoding, as the app did before the lookup-table decoder"""
+    out = df_sub.copy()
+    for c in out.columns:
+        out[c] = out[c].astype(str).str.extract(r"(\d+)").astype(float)
+    return out
+
+
+def qcut_crosstab(valid, bins=3):
+    x_cat = pd.qcut(valid["X_total"], q=bins, duplicates="drop")
+    y_cat = pd.qcut(valid["Y_total"], q=bins, duplicates="drop")
+    return pd.crosstab(x_cat, y_cat)
+
+
+def scipy_tests(valid, ctab):
+    return (
+        stats.pearsonr(valid["X_total"], valid["Y_total"]),
+        stats.spearmanr(valid["X_total"], valid["Y_total"]),
+        stats.chi2_contingency(ctab),
+    )
+
+
+def benchmark_rows(rows, work_dir, seed=0, trace=True, legacy=False):
+    csv_path = os.path.join(work_dir, f"survey_{rows}.csv")
+    cache_dir = os.path.join(work_dir, "cache")
+    write_survey_csv(csv_path, rows, seed)
+    timer = StageTimer(rows, trace)
+
+    timer.run("load_csv", load_survey_csv, csv_path, cache_dir=None)
+    timer.run("load_csv_to_cache", load_survey_csv, csv_path, cache_dir=cache_dir)
+    df = timer.run("load_parquet_cache", load_survey_csv, csv_path, cache_dir=cache_dir)
+
+    if legacy:
+        timer.run("likert_regex", likert_regex, df[X_ITEMS + Y_ITEMS])
+    decoded = timer.run("likert_decode", decode_likert, df, X_ITEMS + Y_ITEMS)
+    df["X_total"] = timer.run("x_total", decoded[X_ITEMS].sum, axis=1, min_count=1)
+    df["Y_total"] = decoded[Y_ITEMS].sum(axis=1, min_count=1)
+
+    numeric_cols = ["2. Age (numeric)", "X_total", "Y_total"]
+    timer.run("describe", describe_columns, df, numeric_cols)
+    timer.run("frequencies", frequency_tables, df, list(DEMOGRAPHICS))
+    valid = df[["X_total", "Y_total"]].dropna()
+    ctab = timer.run("qcut_crosstab", qcut_crosstab, valid)
+    timer.run("scipy_tests", scipy_tests, valid, ctab)
+    timer.run("cube_build", SurveyCube.build, df, list(DEMOGRAPHICS))
+    os.remove(csv_path)
+    return timer.results
+
+
+# ================== REPORTING ==================
+def metadata(traced):
+    return {
+        "tracemalloc": traced,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(results, baseline_path, tolerance, traced):
+    """Print the slowdown per (rows, stage) against a baseline; returns the regressions"""
+    data = load_results(baseline_path)
+    if data.get("meta", {}).get("tracemalloc", traced) != traced:
+        print("Warning: baseline and this run differ in tracemalloc use; timings are not comparable")
+    return compare_results(results, data["results"], [("rows", ">10"), ("stage", "<22")], "seconds", tolerance)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--out", default="survey_benchmark.json", help="JSON results file")
+    parser.add_argument("--work-dir", default=None, help="Where the synthetic CSVs go (default: temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-trace", action="store_true", help="Skip tracemalloc (lower overhead, no per-stage memory)")
+    parser.add_argument("--legacy", action="store_true", help="Also time the old per-cell regex Likert decoding")
+    parser.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="survey_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    if not args.no_trace:
+        tracemalloc.start()
+    results = []
+    try:
+        for rows in args.rows:
+            results += benchmark_rows(rows, work_dir, args.seed, not args.no_trace, args.legacy)
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": metadata(not args.no_trace), "results": results}, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance, not args.no_trace)
+        if regressions:
+            print(f"{len(regressions)} stage(s) slower than {1 + args.tolerance:.2f}x baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
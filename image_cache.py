@@ -0,0 +1,200 @@
+"""Content-hash keyed LRU cache for decoded images and processing results
+
+Keys combine a hash of the image content with the operation parameters, so
+identical requests are served from memory (or the optional disk tier) no
+matter which session or rerun asked first.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def content_hash(data):
+    """Hash raw bytes or a numpy array (shape and dtype included)"""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(data, np.ndarray):
+        h.update(str((data.shape, data.dtype.str)).encode())
+        h.update(np.ascontiguousarray(data).data)
+    else:
+        h.update(data)
+    return h.hexdigest()
+
+def make_key(image_hash, op, **params):
+    """Cache key for an operation with its parameters on a given image"""
+    def default(value):
+        if isinstance(value, np.ndarray):
+            return np.round(value.astype(np.float64), 6).tolist()
+        return str(value)
+    payload = json.dumps(params, sort_keys=True, default=default)
+    return f"{image_hash}-{op}-{hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()}"
+
+def _nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return len(value)
+
+
+class ResultCache:
+    """Thread-safe LRU with a byte budget and an optional write-through disk tier
+
+    Values are numpy arrays (stored read-only) or bytes. Entries put with
+    disk=False (e.g. decoded uploads, cheap to redo from the upload bytes)
+    stay in memory only. The disk tier keeps a running byte total and only
+    scans its directory when that total passes disk_max_bytes.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024, disk_dir=None, disk_max_bytes=2 * 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = self._prune_disk()
+
+    # ---------- memory tier ----------
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            self._store(key, value)
+        return value
+
+    def put(self, key, value, disk=True):
+        """Store a value, evicting least recently used entries beyond the byte budget"""
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+        with self._lock:
+            self._store(key, value)
+        if disk:
+            self._disk_put(key, value)
+        return value
+
+    def get_or_compute(self, key, compute, disk=True):
+        """Cached value for key, computing and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value, disk)
+        return value
+
+    def _store(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= _nbytes(self._entries.pop(key))
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= _nbytes(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    # ---------- disk tier ----------
+    def _disk_path(self, key, value=None):
+        suffix = ".bin" if isinstance(value, (bytes, bytearray)) else ".npy"
+        return os.path.join(self.disk_dir, key + suffix)
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        npy_path, bin_path = self._disk_path(key), self._disk_path(key, b"")
+        try:
+            if os.path.exists(npy_path):
+                os.utime(npy_path)
+                return np.load(npy_path)
+            if os.path.exists(bin_path):
+                os.utime(bin_path)
+                with open(bin_path, 'rb') as f:
+                    return f.read()
+        except (OSError, ValueError):
+            return None
+        return None
+
+    def _disk_put(self, key, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key, value)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                if isinstance(value, np.ndarray):
+                    np.save(f, value)
+                else:
+                    f.write(value)
+            size = os.path.getsize(tmp_path)
+            replaced = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        with self._disk_lock:
+            self._disk_bytes += size - replaced
+            if self._disk_bytes > self.disk_max_bytes:
+                self._disk_bytes = self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete least recently used files until the directory fits; returns its size"""
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith((".npy", ".bin")):
+                path = os.path.join(self.disk_dir, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        return total
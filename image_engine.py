@@ -0,0 +1,486 @@
+"""UI-free image processing core shared by the Streamlit app and batch tools"""
+import numpy as np
+from math import radians, sin, cos
+
+
+# ================== IMAGE I/O ==================
+def load_image(path):
+    """Load an image file as an RGB uint8 array"""
+    from PIL import Image
+
+    return np.array(Image.open(path).convert('RGB'))
+
+def save_image(image_array, path):
+    """Save an RGB or RGBA array to disk"""
+    from PIL import Image
+
+    Image.fromarray(image_array).save(path)
+
+# ================== MATRIX TRANSFORMATION FUNCTIONS ==================
+def translation_matrix(tx, ty):
+    """Create translation matrix"""
+    return np.float32([[1, 0, tx], [0, 1, ty]])
+
+def scaling_matrix(sx, sy):
+    """Create scaling matrix"""
+    return np.float32([[sx, 0, 0], [0, sy, 0]])
+
+def rotation_matrix(angle, cx=None, cy=None):
+    """Create rotation matrix"""
+    r = radians(angle)
+    if cx is None or cy is None:
+        return np.float32([[cos(r), -sin(r), 0], [sin(r), cos(r), 0]])
+    else:
+        return np.float32([
+            [cos(r), -sin(r), cx - cos(r) * cx + sin(r) * cy],
+            [sin(r), cos(r), cy - sin(r) * cx - cos(r) * cy]
+        ])
+
+def shearing_matrix(shx, shy):
+    """Create shearing matrix"""
+    return np.float32([[1, shx, 0], [shy, 1, 0]])
+
+def reflection_matrix(axis):
+    """Create reflection matrix"""
+    if "Horizontal" in axis or "x" in axis.lower():
+        return np.float32([[1, 0, 0], [0, -1, 0]])
+    else:
+        return np.float32([[-1, 0, 0], [0, 1, 0]])
+
+def to_homogeneous(M):
+    """Promote a 2x3 affine matrix to 3x3 homogeneous form"""
+    M = np.asarray(M, dtype=np.float64)
+    if M.shape == (3, 3):
+        return M
+    return np.vstack([M, [0, 0, 1]])
+
+def affine_output_geometry(M, w, h):
+    """Shifted 2x3 matrix and output size that fit the whole transformed image"""
+    # Calculate output dimensions
+    corners = np.float64([[0, 0], [w, 0], [0, h], [w, h]])
+    ones = np.ones((4, 1), dtype=np.float64)
+    corners_homogeneous = np.hstack([corners, ones])
+
+    # Apply transformation
+    M_homogeneous = to_homogeneous(M)
+    transformed_corners = (M_homogeneous @ corners_homogeneous.T).T
+
+    # Calculate new dimensions
+    min_x, max_x = int(transformed_corners[:, 0].min()), int(transformed_corners[:, 0].max())
+    min_y, max_y = int(transformed_corners[:, 1].min()), int(transformed_corners[:, 1].max())
+    new_w, new_h = max_x - min_x, max_y - min_y
+
+    # Adjust matrix for positive coordinates
+    shift = np.float64([[1, 0, -min_x], [0, 1, -min_y]])
+    shift_3x3 = np.vstack([shift, [0, 0, 1]])
+    combined = shift_3x3 @ M_homogeneous
+    M_final = combined[:2, :]
+    return M_final, new_w, new_h
+
+def apply_affine_transform(img, M):
+    """Apply affine transformation (2x3 or 3x3) to image"""
+    import cv2
+
+    h, w = img.shape[:2]
+    M_final, new_w, new_h = affine_output_geometry(M, w, h)
+
+    # Apply warp affine
+    result = cv2.warpAffine(img, M_final, (new_w, new_h))
+    return result
+
+class TransformStack:
+    """Chain of affine steps composed into one matrix and warped in a single pass
+
+    Steps are multiplied as 3x3 homogeneous matrices (later steps on the left),
+    so a chain of N transforms costs one resample instead of N.
+    """
+
+    def __init__(self, matrices=None):
+        self.matrices = []
+        for M in matrices or []:
+            self.push(M)
+
+    def push(self, M):
+        """Append a 2x3 or 3x3 matrix to the end of the chain"""
+        self.matrices.append(to_homogeneous(M))
+        return self
+
+    def clear(self):
+        self.matrices.clear()
+
+    def __len__(self):
+        return len(self.matrices)
+
+    def composed(self):
+        """Composite 3x3 matrix of the whole chain"""
+        M_composite = np.eye(3)
+        for M in self.matrices:
+            M_composite = M @ M_composite
+        return M_composite
+
+    def apply(self, img):
+        """Warp the image once with the composite matrix"""
+        return apply_affine_transform(img, self.composed())
+
+# ================== CONVOLUTION FILTERS ==================
+# Indonesian filter labels from the UI map onto the English kernel names
+FILTER_ALIASES = {
+    "Tajamkan": "Sharpen",
+    "Deteksi Tepi": "Edge Detection",
+}
+
+def get_convolution_kernel(filter_name, kernel_size=3):
+    """Get convolution kernel based on filter name, for any odd kernel size"""
+    filter_name = FILTER_ALIASES.get(filter_name, filter_name)
+    k = int(kernel_size)
+    if k == 3:
+        kernels = {
+            "Blur": np.ones((3, 3), dtype=np.float32) / 9.0,
+            "Sharpen": np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32),
+            "Edge Detection": np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32),
+            "Emboss": np.array([[-2, -1, 0], [-1, 1, 1], [0, 1, 2]], dtype=np.float32),
+        }
+        return kernels.get(filter_name, kernels["Blur"])
+
+    c = k // 2
+    if filter_name == "Sharpen":
+        kernel = -np.ones((k, k), dtype=np.float32)
+        kernel[c, c] = k * k
+    elif filter_name == "Edge Detection":
+        kernel = -np.ones((k, k), dtype=np.float32)
+        kernel[c, c] = k * k - 1
+    elif filter_name == "Emboss":
+        # Diagonal gradient scaled so the corners stay at -2/+2 like the 3x3 kernel
+        i, j = np.indices((k, k))
+        kernel = ((i + j - (k - 1)) * 2.0 / (k - 1)).astype(np.float32)
+        kernel[c, c] = 1
+    else:
+        kernel = np.ones((k, k), dtype=np.float32) / float(k * k)
+    return kernel
+
+def separable_factors(kernel, tol=1e-6):
+    """Return (column, row) 1-D factors if the kernel has rank 1, else None"""
+    u, s, vt = np.linalg.svd(kernel.astype(np.float64))
+    if s[0] == 0 or (len(s) > 1 and s[1] > tol * s[0]):
+        return None
+    scale = np.sqrt(s[0])
+    return (u[:, 0] * scale).astype(np.float32), (vt[0] * scale).astype(np.float32)
+
+def select_convolution_backend(kernel):
+    """Pick 'separable' or 'direct' for a kernel
+
+    'fft' is never picked automatically: filter2D already switches to a DFT
+    for large kernels. Up to 31x31 (the app's largest) fft_filter2d was no
+    faster on 0.3-12 MP images and needed ~18x the memory. It is still
+    available as an explicit backend.
+    """
+    if min(kernel.shape) > 1 and separable_factors(kernel) is not None:
+        return "separable"
+    return "direct"
+
+def fft_filter2d(image_array, kernel):
+    """Frequency-domain equivalent of cv2.filter2D(img, -1, kernel) for uint8 images"""
+    import cv2
+    from scipy import fft as sp_fft
+
+    kh, kw = kernel.shape
+    ay, ax = kh // 2, kw // 2
+    h, w = image_array.shape[:2]
+
+    # Same border handling as filter2D (BORDER_REFLECT_101)
+    padded = cv2.copyMakeBorder(image_array, ay, kh - 1 - ay, ax, kw - 1 - ax, cv2.BORDER_REFLECT_101)
+    ph, pw = padded.shape[:2]
+    fh, fw = cv2.getOptimalDFTSize(ph), cv2.getOptimalDFTSize(pw)
+
+    # filter2D is a correlation, i.e. a convolution with the flipped kernel
+    # scipy.fft keeps float32 precision and can use every core
+    kernel_f = sp_fft.rfft2(kernel[::-1, ::-1].astype(np.float32), s=(fh, fw))
+    if padded.ndim == 3:
+        kernel_f = kernel_f[:, :, np.newaxis]
+    image_f = sp_fft.rfft2(padded.astype(np.float32), s=(fh, fw), axes=(0, 1), workers=-1)
+    full = sp_fft.irfft2(image_f * kernel_f, s=(fh, fw), axes=(0, 1), workers=-1)
+
+    result = full[kh - 1:kh - 1 + h, kw - 1:kw - 1 + w]
+    return np.clip(np.rint(result), 0, 255).astype(np.uint8)
+
+def convolve_image(image_array, kernel, backend="auto"):
+    """Convolve a uint8 image with a kernel using the fastest suitable backend"""
+    import cv2
+
+    if image_array.dtype != np.uint8:
+        image_array = image_array.astype(np.uint8)
+    if backend == "auto":
+        backend = select_convolution_backend(kernel)
+
+    if backend == "separable":
+        factors = separable_factors(kernel)
+        if factors is not None:
+            ky, kx = factors
+            return cv2.sepFilter2D(image_array, -1, kx, ky)
+    elif backend == "fft":
+        return fft_filter2d(image_array, kernel)
+    return cv2.filter2D(image_array, -1, kernel)
+
+def apply_convolution_filter(image_array, filter_name, kernel_size=3, backend="auto"):
+    """Apply a named convolution filter to an image array"""
+    kernel = get_convolution_kernel(filter_name, kernel_size)
+    return convolve_image(image_array, kernel, backend)
+
+# ================== BACKGROUND REMOVAL ==================
+# Multi-resolution GrabCut presets: GrabCut runs on a copy whose longest side is
+# max_side, then only a band of band_px around the upsampled mask edge is refined
+# at full resolution, in windows of refine_tile px.
+GRABCUT_PRESETS = {
+    "fast": {"max_side": 320, "iterations": 3, "band_px": 4, "refine_iterations": 1, "refine_tile": 96},
+    "balanced": {"max_side": 640, "iterations": 5, "band_px": 6, "refine_iterations": 2, "refine_tile": 128},
+    "quality": {"max_side": 1024, "iterations": 5, "band_px": 10, "refine_iterations": 3, "refine_tile": 192},
+}
+
+def clamp_roi(x, y, w, h, width, height):
+    """Ensure ROI is within image bounds"""
+    x = max(0, min(x, width - 1))
+    y = max(0, min(y, height - 1))
+    w = max(10, min(w, width - x))
+    h = max(10, min(h, height - y))
+    return x, y, w, h
+
+def grabcut_mask(image_array, x, y, w, h, iterations=5):
+    """Binary foreground mask from full-resolution GrabCut"""
+    import cv2
+
+    height, width = image_array.shape[:2]
+    x, y, w, h = clamp_roi(x, y, w, h, width, height)
+
+    # Initialize mask
+    mask = np.zeros((height, width), np.uint8)
+
+    # Background and foreground models
+    bgd_model = np.zeros((1, 65), np.float64)
+    fgd_model = np.zeros((1, 65), np.float64)
+
+    # Apply GrabCut with rectangle initialization
+    cv2.grabCut(image_array, mask, (x, y, w, h), bgd_model, fgd_model, iterations, cv2.GC_INIT_WITH_RECT)
+
+    # Create binary mask: 0 for background, 1 for foreground
+    return np.where((mask == 2) | (mask == 0), 0, 1).astype('uint8')
+
+def grabcut_mask_multires(image_array, x, y, w, h, preset="balanced"):
+    """Binary foreground mask from downscaled GrabCut plus full-resolution band refinement"""
+    import cv2
+
+    settings = GRABCUT_PRESETS[preset]
+    height, width = image_array.shape[:2]
+    x, y, w, h = clamp_roi(x, y, w, h, width, height)
+
+    scale = settings["max_side"] / float(max(height, width))
+    if scale >= 1:
+        return grabcut_mask(image_array, x, y, w, h, settings["iterations"])
+
+    # 1. Coarse GrabCut on the downscaled image
+    small = cv2.resize(image_array, (max(1, round(width * scale)), max(1, round(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    small_mask = grabcut_mask(
+        small, int(x * scale), int(y * scale),
+        max(1, int(w * scale)), max(1, int(h * scale)), settings["iterations"]
+    )
+
+    # 2. Upsample the soft mask and threshold it at full resolution
+    soft = cv2.resize(small_mask.astype(np.float32), (width, height), interpolation=cv2.INTER_LINEAR)
+    mask = (soft >= 0.5).astype(np.uint8)
+
+    # 3. Uncertain band around the upsampled edge, wide enough to cover one coarse pixel
+    band_px = settings["band_px"] + int(np.ceil(1.0 / scale))
+    se = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (2 * band_px + 1, 2 * band_px + 1))
+    band = cv2.dilate(mask, se) != cv2.erode(mask, se)
+
+    gc_mask = np.where(mask == 1, cv2.GC_FGD, cv2.GC_BGD).astype(np.uint8)
+    gc_mask[band & (mask == 1)] = cv2.GC_PR_FGD
+    gc_mask[band & (mask == 0)] = cv2.GC_PR_BGD
+    roi_mask = np.zeros((height, width), bool)
+    roi_mask[y:y + h, x:x + w] = True
+    gc_mask[~roi_mask] = cv2.GC_BGD
+
+    # 4. Refine only windows that touch the band, with GMMs fitted locally
+    tile = settings["refine_tile"]
+    for ty in range(0, height, tile):
+        for tx in range(0, width, tile):
+            ty1, tx1 = min(ty + tile, height), min(tx + tile, width)
+            if not band[ty:ty1, tx:tx1].any():
+                continue
+            wy0, wy1 = max(ty - band_px, 0), min(ty1 + band_px, height)
+            wx0, wx1 = max(tx - band_px, 0), min(tx1 + band_px, width)
+            window_mask = gc_mask[wy0:wy1, wx0:wx1].copy()
+            is_fg = (window_mask == cv2.GC_FGD) | (window_mask == cv2.GC_PR_FGD)
+            # GMM initialisation needs enough samples of both classes
+            if is_fg.sum() < 50 or (~is_fg).sum() < 50:
+                continue
+            bgd_model = np.zeros((1, 65), np.float64)
+            fgd_model = np.zeros((1, 65), np.float64)
+            cv2.grabCut(
+                np.ascontiguousarray(image_array[wy0:wy1, wx0:wx1]), window_mask, None,
+                bgd_model, fgd_model, settings["refine_iterations"], cv2.GC_INIT_WITH_MASK
+            )
+            refined = (window_mask == cv2.GC_FGD) | (window_mask == cv2.GC_PR_FGD)
+            # Write back only the tile core, and only inside the band
+            cy0, cy1, cx0, cx1 = ty - wy0, ty1 - wy0, tx - wx0, tx1 - wx0
+            tile_band = band[ty:ty1, tx:tx1]
+            mask[ty:ty1, tx:tx1][tile_band] = refined[cy0:cy1, cx0:cx1][tile_band]
+
+    mask[~roi_mask] = 0
+    return mask
+
+def mask_to_rgba(image_array, mask2):
+    """Apply a binary mask and make the background transparent"""
+    import cv2
+
+    # Apply mask to image
+    result = image_array * mask2[:, :, np.newaxis]
+
+    # Create transparent background (RGBA)
+    rgba = cv2.cvtColor(result, cv2.COLOR_RGB2RGBA)
+    rgba[:, :, 3] = mask2 * 255
+    return rgba
+
+def remove_background_grabcut(image_array, x, y, w, h, iterations=5, preset=None):
+    """Remove background using GrabCut algorithm
+
+    preset=None runs GrabCut at full resolution; "fast", "balanced" or
+    "quality" use the multi-resolution path (see GRABCUT_PRESETS).
+    """
+    if preset is None:
+        mask2 = grabcut_mask(image_array, x, y, w, h, iterations)
+    else:
+        mask2 = grabcut_mask_multires(image_array, x, y, w, h, preset)
+    return mask_to_rgba(image_array, mask2)
+
+def default_roi(width, height):
+    """Default GrabCut ROI covering the central 80% of the image"""
+    x = max(0, int(width * 0.1))
+    y = max(0, int(height * 0.1))
+    w = min(int(width * 0.8), width - x)
+    h = min(int(height * 0.8), height - y)
+    return x, y, w, h
+
+# ================== LIVE PREVIEW ==================
+PREVIEW_MAX_SIDE = 640
+
+def make_proxy(image_array, max_side=PREVIEW_MAX_SIDE):
+    """Downscaled copy for interactive previews; returns (proxy, scale)"""
+    import cv2
+
+    height, width = image_array.shape[:2]
+    scale = min(1.0, max_side / float(max(height, width)))
+    if scale >= 1.0:
+        return image_array, 1.0
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image_array, size, interpolation=cv2.INTER_AREA), scale
+
+def proxy_matrix(M, scale):
+    """Express a full-resolution affine matrix in proxy pixel coordinates"""
+    S = np.float64([[scale, 0, 0], [0, scale, 0], [0, 0, 1]])
+    S_inv = np.float64([[1 / scale, 0, 0], [0, 1 / scale, 0], [0, 0, 1]])
+    return (S @ to_homogeneous(M) @ S_inv)[:2, :]
+
+def proxy_kernel_size(kernel_size, scale):
+    """Odd kernel size covering the same image footprint on the proxy"""
+    k = int(round(kernel_size * scale))
+    return max(3, k + 1 if k % 2 == 0 else k)
+
+def draw_roi_preview(proxy, x, y, w, h, scale):
+    """Draw the full-resolution ROI onto a copy of the proxy"""
+    import cv2
+
+    preview = proxy.copy()
+    p1 = (int(x * scale), int(y * scale))
+    p2 = (int((x + w) * scale), int((y + h) * scale))
+    cv2.rectangle(preview, p1, p2, (0, 255, 0), 2)
+    return preview
+
+# ================== PDF REPORT GENERATION ==================
+REPORT_IMAGE_BOX = 200  # points; each image is drawn into a 200x200 pt box
+
+def jpeg_thumbnail(image, max_px, quality=85):
+    """JPEG bytes of a PIL image or array, downsampled to fit max_px x max_px"""
+    from io import BytesIO
+
+    from PIL import Image, ImageOps
+
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(image)
+    thumb = image
+    if max(image.size) > max_px:
+        # Resize into a new image; never upscale small ones
+        thumb = ImageOps.contain(image, (max_px, max_px), Image.LANCZOS)
+    if thumb.mode == 'RGBA':
+        # JPEG has no alpha channel; flatten onto white
+        background = Image.new('RGB', thumb.size, (255, 255, 255))
+        background.paste(thumb, mask=thumb.split()[3])
+        thumb = background
+    elif thumb.mode != 'RGB':
+        thumb = thumb.convert('RGB')
+
+    buf = BytesIO()
+    thumb.save(buf, format="JPEG", quality=quality, optimize=True)
+    return buf.getvalue()
+
+def report_image(image, embed_jpeg=False, dpi=150, jpeg_quality=85):
+    """ImageReader for a PIL image, optionally downsampled to dpi and JPEG-compressed"""
+    from io import BytesIO
+    from reportlab.lib.utils import ImageReader
+
+    if not embed_jpeg:
+        return ImageReader(image)
+
+    # 200 pt at the target DPI is all the pixels the page can show
+    max_px = int(np.ceil(REPORT_IMAGE_BOX * dpi / 72.0))
+    return ImageReader(BytesIO(jpeg_thumbnail(image, max_px, jpeg_quality)))
+
+def generate_pdf_report(title, original_img, processed_img, params=None,
+                        embed_jpeg=False, dpi=150, jpeg_quality=85):
+    """Generate PDF report with images and parameters, returned as bytes
+
+    Everything stays in memory. With embed_jpeg=True both images are
+    downsampled to the print DPI of their 200x200 pt box and embedded as JPEG.
+    """
+    from io import BytesIO
+    from datetime import datetime
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import A4
+
+    buf = BytesIO()
+
+    # Create PDF canvas
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+
+    # Set title
+    c.setFont("Helvetica-Bold", 20)
+    c.drawString(50, height - 50, title)
+
+    # Add timestamp
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    c.setFont("Helvetica", 10)
+    c.drawString(50, height - 70, f"Generated on: {timestamp}")
+
+    # Add images to PDF
+    box = REPORT_IMAGE_BOX
+    c.drawString(50, height - 100, "Original Image:")
+    c.drawImage(report_image(original_img, embed_jpeg, dpi, jpeg_quality), 50, height - 300, box, box)
+
+    c.drawString(300, height - 100, "Processed Image:")
+    c.drawImage(report_image(processed_img, embed_jpeg, dpi, jpeg_quality), 300, height - 300, box, box)
+
+    # Add parameters if available
+    if params:
+        c.drawString(50, height - 320, "Processing Parameters:")
+        y_pos = height - 340
+        for key, value in params.items():
+            c.drawString(60, y_pos, f"- {key}: {value}")
+            y_pos -= 20
+
+    # Add footer
+    c.setFont("Helvetica-Oblique", 8)
+    c.drawString(50, 30, "Generated by Matrix Image Processing App")
+
+    c.save()
+    return buf.getvalue()
@@ -0,0 +1,213 @@
+"""Tiled streaming execution of filters and affine warps for very large images
+
+Images are read through a memory map (.npy) and processed tile by tile, so
+only one tile plus its halo / source window is resident at a time. Results
+are written straight into a memory-mapped .npy output file.
+
+PNG/JPEG inputs cannot be read by tile and are decoded in full, so the
+memory budget only holds for .npy input. Convert a large scan once with
+--convert (one full decode), then run the pipeline on the .npy file.
+
+Example:
+    python image_tiles.py scan.png scan.npy --convert
+    python image_tiles.py scan.npy out.npy --memory-mb 256 --pipeline '[{"op": "filter", "name": "Blur", "kernel_size": 31}]'
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+import cv2
+
+from image_engine import (
+    load_image, to_homogeneous, affine_output_geometry, get_convolution_kernel,
+    convolve_image, TransformStack,
+)
+from batch_engine import load_pipeline, build_transform_matrix
+
+DEFAULT_TILE_SIZE = 1024
+
+
+# ================== SOURCES & SINKS ==================
+def open_source(path):
+    """Open an image for tiled reading; .npy files are memory-mapped, not loaded"""
+    if path.lower().endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    # Compressed formats (PNG/JPEG) have to be decoded once in full
+    return load_image(path)
+
+def image_to_npy(path, npy_path):
+    """Decode an image once and store it as a .npy file for memory-mapped reuse"""
+    array = load_image(path)
+    np.save(npy_path, array)
+    return npy_path
+
+def open_sink(path, shape, dtype=np.uint8):
+    """Create a memory-mapped .npy output file that tiles are written into"""
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+def tile_size_for_budget(budget_bytes, channels=3, halo=0, window_ratio=1.0):
+    """Largest square tile whose working set (input window, float FFT buffers, output) fits the budget
+
+    window_ratio is the source window area read per output tile area
+    (see window_area_ratio); warps that downscale or rotate read more.
+    """
+    # ~ uint8 window + float32 working copies + uint8 output, per pixel
+    bytes_per_pixel = channels * (1 + 4 * 2 + 1) * max(window_ratio, 1.0)
+    side = int(np.sqrt(budget_bytes / bytes_per_pixel)) - 2 * halo
+    return max(side, 64)
+
+def iter_tiles(height, width, tile_size=DEFAULT_TILE_SIZE):
+    """Yield (y0, y1, x0, x1) tile boxes covering the image"""
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            yield y0, min(y0 + tile_size, height), x0, min(x0 + tile_size, width)
+
+# ================== TILED CONVOLUTION ==================
+def tiled_convolve(src, kernel, out, tile_size=DEFAULT_TILE_SIZE, backend="auto"):
+    """Convolve src into out tile by tile, reading a halo around every tile
+
+    Halos are clamped at the image border, where filter2D's reflected border
+    then matches the untiled result exactly.
+    """
+    height, width = src.shape[:2]
+    kh, kw = kernel.shape
+    hy, hx = kh // 2, kw // 2
+    for y0, y1, x0, x1 in iter_tiles(height, width, tile_size):
+        wy0, wy1 = max(y0 - hy, 0), min(y1 + hy, height)
+        wx0, wx1 = max(x0 - hx, 0), min(x1 + hx, width)
+        window = np.ascontiguousarray(src[wy0:wy1, wx0:wx1])
+        filtered = convolve_image(window, kernel, backend)
+        out[y0:y1, x0:x1] = filtered[y0 - wy0:y1 - wy0, x0 - wx0:x1 - wx0]
+    return out
+
+# ================== TILED AFFINE WARP ==================
+def tiled_affine_transform(src, M, out_path, tile_size=DEFAULT_TILE_SIZE):
+    """Warp src with M into a memory-mapped output, one output tile at a time
+
+    Each output tile is inverse-mapped into the source to find the window it
+    samples from; only that window is read.
+    """
+    height, width = src.shape[:2]
+    M_final, new_w, new_h = affine_output_geometry(M, width, height)
+    out = open_sink(out_path, (new_h, new_w) + src.shape[2:], src.dtype)
+    M_inv = np.linalg.inv(to_homogeneous(M_final))
+
+    margin = 2  # bilinear sampling reaches one pixel past the mapped corner
+    for y0, y1, x0, x1 in iter_tiles(new_h, new_w, tile_size):
+        corners = np.float64([[x0, y0, 1], [x1, y0, 1], [x0, y1, 1], [x1, y1, 1]])
+        src_corners = (M_inv @ corners.T).T
+        sx0 = max(int(np.floor(src_corners[:, 0].min())) - margin, 0)
+        sy0 = max(int(np.floor(src_corners[:, 1].min())) - margin, 0)
+        sx1 = min(int(np.ceil(src_corners[:, 0].max())) + margin, width)
+        sy1 = min(int(np.ceil(src_corners[:, 1].max())) + margin, height)
+        if sx0 >= sx1 or sy0 >= sy1:
+            continue  # tile lies entirely outside the warped image; sink is zero-filled
+
+        window = np.ascontiguousarray(src[sy0:sy1, sx0:sx1])
+        to_window = np.float64([[1, 0, sx0], [0, 1, sy0], [0, 0, 1]])
+        to_tile = np.float64([[1, 0, -x0], [0, 1, -y0], [0, 0, 1]])
+        M_tile = (to_tile @ to_homogeneous(M_final) @ to_window)[:2, :]
+        out[y0:y1, x0:x1] = cv2.warpAffine(window, M_tile, (x1 - x0, y1 - y0))
+    out.flush()
+    return out
+
+def window_area_ratio(M):
+    """Source window area per output tile area for the warp M
+
+    An output tile of side t maps back to a source box of
+    t * (|a| + |b|) by t * (|c| + |d|), with [[a, b], [c, d]] the linear
+    part of M's inverse: larger for downscaling and for rotations.
+    """
+    A_inv = np.linalg.inv(to_homogeneous(M)[:2, :2])
+    return float(np.abs(A_inv).sum(axis=1).prod())
+
+# ================== TILED PIPELINE ==================
+def fuse_stages(steps, shape):
+    """Pipeline steps with consecutive transforms fused into TransformStacks, as run_pipeline does"""
+    stages = []
+    for step in steps:
+        if step["op"] == "transform":
+            if not stages or not isinstance(stages[-1], TransformStack):
+                stages.append(TransformStack())
+            stages[-1].push(build_transform_matrix(step, shape))
+        else:
+            stages.append(step)
+    return stages
+
+def run_tiled_pipeline(src, steps, out_path, tile_size=DEFAULT_TILE_SIZE):
+    """Run transform and filter steps tiled, staging intermediates as memory-mapped files"""
+    if any(step["op"] == "grabcut" for step in steps):
+        raise ValueError("GrabCut needs the whole image and cannot run in tiled mode")
+
+    stages = fuse_stages(steps, src.shape)
+
+    if not stages:
+        out = open_sink(out_path, src.shape, src.dtype)
+        for y0, y1, x0, x1 in iter_tiles(src.shape[0], src.shape[1], tile_size):
+            out[y0:y1, x0:x1] = src[y0:y1, x0:x1]
+        out.flush()
+        return out
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(dir=out_dir) as staging:
+        current = src
+        for i, stage in enumerate(stages):
+            last = i == len(stages) - 1
+            target = out_path if last else os.path.join(staging, f"stage_{i}.npy")
+            if isinstance(stage, TransformStack):
+                result = tiled_affine_transform(current, stage.composed(), target, tile_size)
+            else:
+                kernel = get_convolution_kernel(stage.get("name", "Blur"), stage.get("kernel_size", 3))
+                result = open_sink(target, current.shape, np.uint8)
+                tiled_convolve(current, kernel, result, tile_size)
+                result.flush()
+            del current
+            current = result if last else np.load(target, mmap_mode='r')
+        return current
+
+# ================== CLI ==================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiled, memory-bounded image pipeline")
+    parser.add_argument("input", help="Input image (.npy is memory-mapped; other formats are decoded once)")
+    parser.add_argument("output", help="Output .npy file, written tile by tile")
+    parser.add_argument("--pipeline", default=None, help="Pipeline spec: JSON file or inline JSON")
+    parser.add_argument("--tile-size", type=int, default=None, help=f"Tile side in pixels (default {DEFAULT_TILE_SIZE})")
+    parser.add_argument("--memory-mb", type=float, default=None,
+                        help="Derive the tile size from a memory budget (needs .npy input)")
+    parser.add_argument("--convert", action="store_true",
+                        help="Only decode the input image into the output .npy file for later tiled runs")
+    args = parser.parse_args(argv)
+
+    if not args.output.lower().endswith('.npy'):
+        parser.error("output must be a .npy file")
+    if args.convert:
+        image_to_npy(args.input, args.output)
+        print(f"Wrote {args.output}")
+        return 0
+    if args.pipeline is None:
+        parser.error("--pipeline is required unless --convert is given")
+    if args.memory_mb and not args.input.lower().endswith('.npy'):
+        parser.error("--memory-mb needs a .npy input: other formats are decoded in full. "
+                     "Convert once with: image_tiles.py INPUT INPUT.npy --convert")
+
+    steps = load_pipeline(args.pipeline)
+    src = open_source(args.input)
+    tile_size = args.tile_size or DEFAULT_TILE_SIZE
+    if args.memory_mb:
+        halo = max((s.get("kernel_size", 3) // 2 for s in steps if s["op"] == "filter"), default=0)
+        channels = src.shape[2] if src.ndim == 3 else 1
+        window_ratio = max(
+            (window_area_ratio(s.composed()) for s in fuse_stages(steps, src.shape) if isinstance(s, TransformStack)),
+            default=1.0,
+        )
+        tile_size = tile_size_for_budget(args.memory_mb * 1024 * 1024, channels, halo, window_ratio)
+
+    result = run_tiled_pipeline(src, steps, args.output, tile_size)
+    print(f"Wrote {args.output} {result.shape} using {tile_size}px tiles")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""Lightweight per-stage instrumentation: wall time, CPU time and allocated bytes
+
+Wrap code in `with stage("warp"):` or decorate a function with
+`@timed("warp")` (or wrap an imported one: `f = timed("warp")(f)`).
+Stages nest ("preview/warp") and are recorded into the current
+StageRecorder, which each Streamlit session sets with use_recorder().
+
+Allocated bytes are the peak traced allocation during the stage and are
+only available while allocation tracking (tracemalloc) is on, since
+tracing slows Python allocations down. Records export as JSON lines or
+Prometheus text; set INSTRUMENT_JSONL to also append every record to a
+file.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+
+class StageRecorder:
+    """Thread-safe store of recent stage records plus per-stage totals"""
+
+    def __init__(self, max_records=500, jsonl_path=None):
+        self.records = deque(maxlen=max_records)
+        self.totals = {}  # stage -> {"calls", "wall", "cpu", "alloc_max"}
+        self.run_id = 0
+        self.jsonl_path = jsonl_path if jsonl_path is not None else os.environ.get("INSTRUMENT_JSONL")
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        """Mark the start of a script run; last_run() returns only records after this"""
+        with self._lock:
+            self.run_id += 1
+        return self.run_id
+
+    def add(self, name, wall, cpu, alloc_bytes=None, **labels):
+        record = {
+            "ts": time.time(), "run": self.run_id, "stage": name,
+            "wall_s": wall, "cpu_s": cpu, "alloc_bytes": alloc_bytes,
+        }
+        record.update(labels)
+        with self._lock:
+            self.records.append(record)
+            total = self.totals.setdefault(name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "alloc_max": 0})
+            total["calls"] += 1
+            total["wall"] += wall
+            total["cpu"] += cpu
+            if alloc_bytes is not None:
+                total["alloc_max"] = max(total["alloc_max"], alloc_bytes)
+        if self.jsonl_path:
+            try:
+                with open(self.jsonl_path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+            except OSError:
+                pass
+        return record
+
+    def last_run(self):
+        with self._lock:
+            return [r for r in self.records if r["run"] == self.run_id]
+
+    def summary(self):
+        with self._lock:
+            return {name: dict(total) for name, total in self.totals.items()}
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+            self.totals.clear()
+
+    # ---------- export ----------
+    def to_jsonl(self):
+        with self._lock:
+            return "".join(json.dumps(r) + "\n" for r in self.records)
+
+    def to_prometheus(self, prefix="app"):
+        """Prometheus text exposition of the per-stage totals"""
+        metrics = [
+            ("stage_calls_total", "counter", "Number of times the stage ran", "calls"),
+            ("stage_wall_seconds_total", "counter", "Wall-clock seconds spent in the stage", "wall"),
+            ("stage_cpu_seconds_total", "counter", "CPU seconds spent in the stage", "cpu"),
+            ("stage_alloc_bytes_max", "gauge", "Largest traced allocation peak of one call", "alloc_max"),
+        ]
+        summary = self.summary()
+        lines = []
+        for metric, kind, help_text, field in metrics:
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} {kind}")
+            for name, total in sorted(summary.items()):
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_{metric}{{stage="{label}"}} {total[field]}')
+        return "\n".join(lines) + "\n"
+
+
+DEFAULT_RECORDER = StageRecorder()
+_current = contextvars.ContextVar("instrumentation_recorder", default=None)
+_local = threading.local()
+
+
+def use_recorder(recorder):
+    """Record stages of the current thread/context into recorder"""
+    _current.set(recorder)
+    return recorder
+
+
+def current_recorder():
+    return _current.get() or DEFAULT_RECORDER
+
+
+# ================== MEMORY TRACKING ==================
+def set_memory_tracking(enabled):
+    """Turn allocation tracking (tracemalloc) on or off for the whole process"""
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def memory_tracking():
+    return tracemalloc.is_tracing()
+
+
+# ================== STAGES ==================
+@contextmanager
+def stage(name, recorder=None, **labels):
+    """Time the enclosed block; nested stages are recorded as "outer/inner"
+
+    tracemalloc keeps one process-wide peak. Stages running at the same
+    time in other threads (other sessions) add to that peak and reset it,
+    so their allocated bytes can come out too high or too low.
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # Remember the parent's peak so far before resetting it for this stage
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+    frame = {"name": name, "start_mem": current if tracing else 0, "peak": 0}
+    stack.append(frame)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield frame
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        alloc = None
+        if tracing and tracemalloc.is_tracing():
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            alloc = max(0, peak - frame["start_mem"])
+            if len(stack) > 1:
+                stack[-2]["peak"] = max(stack[-2]["peak"], peak)
+        path = "/".join(f["name"] for f in stack)
+        stack.pop()
+        (recorder or current_recorder()).add(path, wall, cpu, alloc, **labels)
+
+
+def timed(name=None, recorder=None):
+    """Decorator recording every call of the function as a stage"""
+    def decorator(fn):
+        stage_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, recorder):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ================== STREAMLIT PANEL ==================
+def sidebar_panel(st, recorder, title="⏱ Performance"):
+    """Collapsible sidebar panel with the last run's stages, totals and exports
+
+    `st` is the streamlit module, passed in so this module stays importable
+    without Streamlit.
+    """
+    with st.sidebar.expander(title, expanded=False):
+        # Tracing is process-wide: show its current state and only change it when
+        # this session's user toggles the box, never just because the script reran
+        st.session_state["perf_track_alloc"] = memory_tracking()
+        st.checkbox(
+            "Track allocations (slower, all sessions)", key="perf_track_alloc",
+            on_change=lambda: set_memory_tracking(st.session_state["perf_track_alloc"]),
+        )
+
+        last = recorder.last_run()
+        if last:
+            st.caption("Last run")
+            st.dataframe([{
+                "Stage": r["stage"],
+                "Wall ms": round(r["wall_s"] * 1000, 1),
+                "CPU ms": round(r["cpu_s"] * 1000, 1),
+                "Alloc MB": None if r["alloc_bytes"] is None else round(r["alloc_bytes"] / 1e6, 2),
+            } for r in last], hide_index=True)
+        else:
+            st.caption("No instrumented stages ran in the last run.")
+
+        summary = recorder.summary()
+        if summary:
+            st.caption("Session totals")
+            st.dataframe([{
+                "Stage": name, "Calls": t["calls"],
+                "Wall s": round(t["wall"], 3), "CPU s": round(t["cpu"], 3),
+                "Max alloc MB": round(t["alloc_max"] / 1e6, 2),
+            } for name, t in sorted(summary.items())], hide_index=True)
+            st.download_button("JSON lines", recorder.to_jsonl(), file_name="stages.jsonl",
+                               mime="application/x-ndjson", key="perf_jsonl")
+            st.download_button("Prometheus", recorder.to_prometheus(), file_name="stages.prom",
+                               mime="text/plain", key="perf_prom")
+            if st.button("Clear", key="perf_clear"):
+                recorder.clear()
@@ -0,0 +1,105 @@
+"""Item-by-item Pearson and Spearman correlation matrices in matrix form
+
+All the sums a pairwise-complete correlation needs (pair counts, sums,
+sums of squares and cross products) come from Gram matrices:
+
+    Z^T Z  and  [Z, Z**2, M]^T M
+
+where Z holds the centred values with missing entries set to 0 and M is
+the 0/1 validity mask (only Z^T Z is needed when nothing is missing).
+Rows are processed in blocks so memory stays bounded. Spearman ranks every column once (average ranks over its
+non-missing values) and reuses the same matmul; with missing values this
+differs slightly from re-ranking each pair's complete rows.
+"""
+import numpy as np
+import pandas as pd
+
+ROW_BLOCK = 65_536
+
+
+def pairwise_moments(X, row_block=ROW_BLOCK):
+    """Pair counts N, sums S (S[i, j] = sum of column i where j is present), sums of squares Q and cross products P"""
+    n, k = X.shape
+    valid = ~np.isnan(X)
+    count = valid.sum(axis=0)
+    center = np.where(count > 0, np.where(valid, X, 0.0).sum(axis=0) / np.maximum(count, 1), 0.0)
+    complete = bool(valid.all())
+    P = np.zeros((k, k))
+    G = None if complete else np.zeros((3 * k, k))
+    for start in range(0, n, row_block):
+        stop = min(start + row_block, n)
+        z = X[start:stop] - center
+        if complete:
+            P += z.T @ z
+            continue
+        m = valid[start:stop].astype(np.float64)
+        z[~valid[start:stop]] = 0.0
+        P += z.T @ z
+        G += np.hstack([z, z * z, m]).T @ m
+    if complete:
+        # No missing values: every pair sees all rows
+        N = np.full((k, k), float(n))
+        S = np.broadcast_to((X - center).sum(axis=0)[:, None], (k, k))
+        Q = np.broadcast_to(np.diag(P)[:, None], (k, k))
+        return N, S, Q, P
+    S = G[:k]           # sum z_i over rows where j is present
+    Q = G[k:2 * k]      # sum z_i^2 over rows where j is present
+    N = G[2 * k:]       # rows where both are present
+    return N, S, Q, P
+
+
+def rank_columns(X):
+    """Average ranks per column over its non-missing values (NaN stays NaN)
+
+    Ranks come from the sorted unique values and their counts, which is
+    much cheaper than a full sort when answers repeat (Likert items).
+    """
+    out = np.empty_like(X, dtype=np.float64)
+    for j in range(X.shape[1]):
+        codes, uniques = pd.factorize(X[:, j], use_na_sentinel=True)
+        order = np.argsort(uniques, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))[order]
+        lookup = np.empty(len(uniques) + 1)
+        lookup[order] = np.cumsum(counts) - (counts - 1) / 2.0
+        lookup[-1] = np.nan  # code -1 (missing)
+        out[:, j] = lookup[codes]
+    return out
+
+
+def correlation_from_moments(N, S, Q, P, min_periods=2):
+    num = N * P - S * S.T
+    den = (N * Q - S * S) * (N * Q.T - S.T * S.T)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = num / np.sqrt(den)
+    r[(N < max(min_periods, 2)) | ~np.isfinite(r)] = np.nan
+    r = np.clip(r, -1.0, 1.0)
+    np.fill_diagonal(r, np.where(np.diag(N) >= max(min_periods, 2), 1.0, np.nan))
+    return r
+
+
+def _as_matrix(df):
+    return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def correlation_matrix(df, method="pearson", min_periods=2, row_block=ROW_BLOCK):
+    """Pairwise-complete Pearson or Spearman matrix for all columns of df"""
+    if method == "spearman":
+        X = rank_columns(_as_matrix(df))
+    else:
+        X = _as_matrix(df)
+    r = correlation_from_moments(*pairwise_moments(X, row_block), min_periods=min_periods)
+    return pd.DataFrame(r, index=df.columns, columns=df.columns)
+
+
+def cluster_order(corr):
+    """Column order from average-linkage clustering on 1 - |r| (for heatmaps)"""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(corr) < 3:
+        return list(corr.columns)
+    dist = 1.0 - np.abs(np.nan_to_num(corr.to_numpy(), nan=0.0))
+    np.fill_diagonal(dist, 0.0)
+    dist = (dist + dist.T) / 2.0
+    order = leaves_list(linkage(squareform(dist, checks=False), method="average"))
+    return [corr.columns[i] for i in order]
@@ -0,0 +1,126 @@
+"""Precomputed aggregate cube over demographic columns
+
+Each non-empty combination of the demographic columns (a cell) stores
+counts, sums and sums of squares of X_total and Y_total, plus the same
+moments over rows where both are present and their cross product. Any
+filter is a mask over the cells and summing the selected rows of the
+stats matrix, so means, variances and Pearson r for a filter never touch
+the raw rows again.
+"""
+import numpy as np
+import pandas as pd
+
+from survey_likert import column_codes
+
+STATS = [
+    "n_x", "sum_x", "sumsq_x",
+    "n_y", "sum_y", "sumsq_y",
+    "n_xy", "sum_px", "sumsq_px", "sum_py", "sumsq_py", "sum_xy",
+]
+_IDX = {name: i for i, name in enumerate(STATS)}
+
+
+def _codes_with_missing(series):
+    """Codes where missing values get their own "nan" level"""
+    codes, uniques = column_codes(series)
+    labels = np.append(np.asarray(uniques, dtype=object).astype(str), "nan")
+    return np.where(codes < 0, len(labels) - 1, codes), labels
+
+
+def _finish(s):
+    """Means, variances (ddof=1) and Pearson r from summed cell statistics"""
+    def mean(total, n):
+        return total / n if n > 0 else np.nan
+
+    def var(total, sumsq, n):
+        return (sumsq - total * total / n) / (n - 1) if n > 1 else np.nan
+
+    n_x, n_y, n_xy = s[_IDX["n_x"]], s[_IDX["n_y"]], s[_IDX["n_xy"]]
+    r = np.nan
+    if n_xy > 1:
+        sx, sy = s[_IDX["sum_px"]], s[_IDX["sum_py"]]
+        cov = s[_IDX["sum_xy"]] - sx * sy / n_xy
+        vx = s[_IDX["sumsq_px"]] - sx * sx / n_xy
+        vy = s[_IDX["sumsq_py"]] - sy * sy / n_xy
+        if vx > 0 and vy > 0:
+            r = float(np.clip(cov / np.sqrt(vx * vy), -1.0, 1.0))
+    return {
+        "N (X)": int(n_x), "Mean X": mean(s[_IDX["sum_x"]], n_x), "Var X": var(s[_IDX["sum_x"]], s[_IDX["sumsq_x"]], n_x),
+        "N (Y)": int(n_y), "Mean Y": mean(s[_IDX["sum_y"]], n_y), "Var Y": var(s[_IDX["sum_y"]], s[_IDX["sumsq_y"]], n_y),
+        "N (pairs)": int(n_xy), "Pearson r": r,
+    }
+
+
+class SurveyCube:
+    """Sparse cube: one row of codes and one row of statistics per non-empty cell"""
+
+    def __init__(self, dims, labels, codes, stats):
+        self.dims = list(dims)
+        self.labels = labels  # dim -> array of level labels
+        self.codes = codes    # (cells, dims) level codes
+        self.stats = stats    # (cells, len(STATS)) float64
+
+    @classmethod
+    def build(cls, df, dims, x="X_total", y="Y_total"):
+        dims = [d for d in dims if d in df.columns]
+        codes, labels = [], {}
+        for dim in dims:
+            c, lab = _codes_with_missing(df[dim])
+            codes.append(c)
+            labels[dim] = lab
+        if dims:
+            key = np.ravel_multi_index(codes, [len(labels[d]) for d in dims])
+        else:
+            key = np.zeros(len(df), dtype=np.int64)
+        cells, inv = np.unique(key, return_inverse=True)
+
+        xv = df[x].to_numpy(dtype=np.float64, na_value=np.nan) if x in df.columns else np.full(len(df), np.nan)
+        yv = df[y].to_numpy(dtype=np.float64, na_value=np.nan) if y in df.columns else np.full(len(df), np.nan)
+        has_x, has_y = ~np.isnan(xv), ~np.isnan(yv)
+        both = has_x & has_y
+        x0, y0 = np.where(has_x, xv, 0.0), np.where(has_y, yv, 0.0)
+        px, py = np.where(both, x0, 0.0), np.where(both, y0, 0.0)
+        columns = [
+            has_x, x0, x0 * x0,
+            has_y, y0, y0 * y0,
+            both, px, px * px, py, py * py, px * py,
+        ]
+        stats = np.column_stack([
+            np.bincount(inv, weights=col.astype(np.float64), minlength=len(cells)) for col in columns
+        ])
+        if dims:
+            cell_codes = np.column_stack(np.unravel_index(cells, [len(labels[d]) for d in dims]))
+        else:
+            cell_codes = np.zeros((len(cells), 0), dtype=np.int64)
+        return cls(dims, labels, cell_codes, stats)
+
+    @property
+    def n_cells(self):
+        return len(self.stats)
+
+    def levels(self, dim):
+        """Labels of the levels that actually occur"""
+        used = np.unique(self.codes[:, self.dims.index(dim)])
+        return self.labels[dim][used].tolist()
+
+    def _mask(self, filters):
+        mask = np.ones(self.n_cells, dtype=bool)
+        for dim, values in (filters or {}).items():
+            if not values or dim not in self.dims:
+                continue
+            wanted = np.flatnonzero(np.isin(self.labels[dim], [str(v) for v in values]))
+            mask &= np.isin(self.codes[:, self.dims.index(dim)], wanted)
+        return mask
+
+    def query(self, filters=None):
+        """Statistics for the rows matching filters ({dim: [labels]}; empty list = all)"""
+        return _finish(self.stats[self._mask(filters)].sum(axis=0))
+
+    def breakdown(self, dim, filters=None):
+        """query() for every level of dim, as a DataFrame"""
+        mask = self._mask(filters)
+        col = self.codes[mask, self.dims.index(dim)]
+        sums = np.zeros((len(self.labels[dim]), len(STATS)))
+        np.add.at(sums, col, self.stats[mask])
+        rows = {self.labels[dim][i]: _finish(sums[i]) for i in np.unique(col)}
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis(dim)
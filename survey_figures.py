@@ -0,0 +1,58 @@
+"""Rendered-PNG cache for the survey charts
+
+Charts are drawn on standalone matplotlib Figures (not pyplot), saved to
+PNG and released immediately, so nothing accumulates in pyplot's figure
+registry over a long session. The PNG bytes are kept in a byte-budgeted
+LRU keyed by a fingerprint of the plotted data plus the plot parameters,
+so a rerun with the same data and settings skips drawing altogether.
+"""
+import hashlib
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+from image_cache import ResultCache, content_hash, make_key
+
+
+def data_fingerprint(*parts):
+    """Content hash of DataFrames, Series, arrays or plain values"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+            h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+        elif isinstance(part, np.ndarray):
+            h.update(content_hash(part).encode())
+        else:
+            h.update(repr(part).encode())
+    return h.hexdigest()
+
+
+def render_png(draw, figsize=(6, 4), dpi=100):
+    """Draw onto a fresh Figure with draw(ax), return PNG bytes and release the figure"""
+    fig = Figure(figsize=figsize)
+    try:
+        ax = fig.subplots()
+        draw(ax)
+        buf = BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+class FigureCache:
+    """PNG bytes per (data fingerprint, chart name, parameters)"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.cache = ResultCache(max_bytes=max_bytes)
+
+    def get(self, name, data, draw, figsize=(6, 4), dpi=100, **params):
+        """Cached PNG for this chart; draw(ax) only runs on a miss"""
+        key = make_key(data_fingerprint(data), name, figsize=figsize, dpi=dpi, **params)
+        return self.cache.get_or_compute(key, lambda: render_png(draw, figsize, dpi))
+
+    def stats(self):
+        return self.cache.stats()
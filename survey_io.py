@@ -0,0 +1,136 @@
+"""Chunked, typed CSV loading for the survey app
+
+The CSV is parsed in chunks with text dtypes inferred from a sample and
+then pinned, so text answers (Likert and demographic columns) become pandas
+categoricals and whole-number columns are downcast to small integers. The parsed frame is written
+to a columnar Parquet cache keyed by the file hash, so the next load of the
+same file skips CSV parsing entirely.
+"""
+import hashlib
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+DEFAULT_CACHE_DIR = os.environ.get("SURVEY_CACHE_DIR", ".survey_cache")
+
+
+def file_digest(source, block_size=1 << 20):
+    """Content hash of a path or file-like object (rewound afterwards)"""
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(block_size), b""):
+                h.update(block)
+    else:
+        source.seek(0)
+        for block in iter(lambda: source.read(block_size), b""):
+            h.update(block)
+        source.seek(0)
+    return h.hexdigest()
+
+
+def infer_dtypes(sample, max_categories=1000):
+    """Dtypes to pin from a sample; only text columns are pinned
+
+    Repetitive text becomes category, other text object. Numeric and empty
+    columns are left to per-chunk inference, since a later chunk may still
+    hold text (an "unknown" age, a first comment far down the file).
+    """
+    dtypes = {}
+    for col in sample.columns:
+        series = sample[col]
+        if pd.api.types.is_numeric_dtype(series) or series.isna().all():
+            continue
+        if series.nunique(dropna=True) <= min(max_categories, max(1, len(series) // 2)):
+            dtypes[col] = "category"
+        else:
+            dtypes[col] = "object"
+    return dtypes
+
+
+def _downcast_numeric(df):
+    """Whole-number columns to the smallest integer type; fractional ones stay float64"""
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_integer_dtype(values):
+            df[col] = pd.to_numeric(values, downcast="integer")
+        elif values.dtype == "float64" and not values.hasnans and (values % 1 == 0).all():
+            df[col] = pd.to_numeric(values, downcast="integer")
+    return df
+
+
+def _rewind(source):
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+
+
+def read_csv_chunked(source, chunksize=200_000, sample_rows=10_000, max_categories=1000):
+    """Parse a CSV in chunks with text dtypes inferred from the first rows and pinned for the rest
+
+    A column the sample saw as numeric or empty that turns out to hold text
+    in a later chunk is read again as text, so any file plain pd.read_csv
+    accepts loads here too.
+    """
+    sample = pd.read_csv(source, nrows=sample_rows)
+    _rewind(source)
+    dtypes = infer_dtypes(sample, max_categories)
+
+    chunks = list(pd.read_csv(source, dtype=dtypes, chunksize=chunksize))
+    if not chunks:
+        return sample.iloc[0:0]
+    columns = list(chunks[0].columns)
+    cat_cols = [c for c, d in dtypes.items() if d == "category"]
+    if len(chunks) == 1:
+        df = chunks[0]
+    else:
+        # pd.concat would fall back to object when chunk categories differ
+        merged = {c: union_categoricals([chunk[c] for chunk in chunks]) for c in cat_cols}
+        df = pd.concat([chunk.drop(columns=cat_cols) for chunk in chunks], ignore_index=True)
+        for col in cat_cols:
+            df[col] = pd.Categorical(merged[col])
+
+    # Unpinned columns parsed as numbers in some chunks and text in others: re-read as text
+    mixed = [
+        c for c in columns
+        if c not in dtypes and len({pd.api.types.is_numeric_dtype(chunk[c]) for chunk in chunks}) > 1
+    ]
+    if mixed:
+        _rewind(source)
+        text = pd.read_csv(source, usecols=mixed, dtype=object)
+        for col, dtype in infer_dtypes(text, max_categories).items():
+            df[col] = text[col].astype(dtype)
+    return _downcast_numeric(df[columns])
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def load_survey_csv(source, digest=None, cache_dir=DEFAULT_CACHE_DIR, chunksize=200_000):
+    """Load a survey CSV, using the Parquet cache for this file's hash when it exists"""
+    use_cache = cache_dir is not None and _parquet_available()
+    if use_cache:
+        digest = digest or file_digest(source)
+        cache_path = os.path.join(cache_dir, f"{digest}.parquet")
+        if os.path.exists(cache_path):
+            return pd.read_parquet(cache_path)
+
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+    df = read_csv_chunked(source, chunksize=chunksize)
+
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, cache_path)
+        except (OSError, ValueError, TypeError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return df
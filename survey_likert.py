@@ -0,0 +1,101 @@
+"""Vectorized Likert decoding for the survey app
+
+Instead of running a regex over every cell, each column is factorized (or
+its categorical codes are used directly), the regex runs once over the
+unique answers to build a lookup table, and the numeric column is a single
+take() through that table. Columns sharing the same answer set share one
+lookup table.
+"""
+import numpy as np
+import pandas as pd
+
+LIKERT_PATTERN = r"(\d+)"
+
+
+def answer_lookup(uniques):
+    """Numeric value of each unique answer (first integer in its text), NaN if none"""
+    if len(uniques) == 0:
+        return np.empty(0, dtype=np.float32)
+    text = pd.Series(np.asarray(uniques, dtype=object)).astype(str)
+    return text.str.extract(LIKERT_PATTERN)[0].astype(float).to_numpy(dtype=np.float32)
+
+
+def column_codes(series):
+    """(codes, uniques) for a column; -1 marks missing values"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+    return pd.factorize(series, use_na_sentinel=True)
+
+
+def decode_likert(df, columns):
+    """Decode Likert answers for all columns in one pass into a float32 frame"""
+    out = np.empty((len(df), len(columns)), dtype=np.float32)
+    tables = {}
+    for j, col in enumerate(columns):
+        codes, uniques = column_codes(df[col])
+        key = tuple(uniques.tolist()) if len(uniques) <= 256 else None
+        table = tables.get(key) if key is not None else None
+        if table is None:
+            # Trailing NaN so that code -1 (missing) maps to NaN
+            table = np.append(answer_lookup(uniques), np.float32(np.nan))
+            if key is not None:
+                tables[key] = table
+        out[:, j] = table[codes]
+    return pd.DataFrame(out, columns=list(columns), index=df.index)
+
+
+class LikertTotals:
+    """Row-wise total over a changing set of Likert items, updated incrementally
+
+    Decoded item columns are kept (optionally in a dict shared with other
+    totals over the same frame), together with a running sum and a per-row
+    count of non-missing items. Changing the selection only adds or
+    subtracts the items that changed; rows with no answered item are NaN,
+    matching sum(axis=1, min_count=1).
+    """
+
+    def __init__(self, df, decoded=None):
+        self.df = df
+        self.decoded = {} if decoded is None else decoded
+        self.columns = []
+        self._sum = np.zeros(len(df), dtype=np.float64)
+        self._count = np.zeros(len(df), dtype=np.int32)
+
+    def _decode_missing(self, columns):
+        missing = [c for c in columns if c not in self.decoded]
+        if missing:
+            frame = decode_likert(self.df, missing)
+            for col in missing:
+                self.decoded[col] = frame[col].to_numpy()
+
+    def _apply(self, col, sign):
+        values = self.decoded[col]
+        answered = ~np.isnan(values)
+        # Likert codes are small integers, so adding and subtracting them is exact
+        self._sum += sign * np.where(answered, values, 0.0)
+        self._count += sign * answered.astype(np.int32)
+
+    def update(self, columns):
+        """Switch to a new item selection and return the updated total"""
+        columns = list(columns)
+        current = set(self.columns)
+        wanted = set(columns)
+        added = [c for c in columns if c not in current]
+        self._decode_missing(added)
+        for col in self.columns:
+            if col not in wanted:
+                self._apply(col, -1)
+        for col in added:
+            self._apply(col, +1)
+        self.columns = columns
+        return self.total()
+
+    def total(self):
+        """Current total as a float Series (NaN where no selected item was answered)"""
+        out = self._sum.copy()
+        out[self._count == 0] = np.nan
+        return pd.Series(out, index=self.df.index)
+
+    def items(self):
+        """Decoded values of the selected items as a DataFrame"""
+        return pd.DataFrame({c: self.decoded[c] for c in self.columns}, index=self.df.index)
@@ -0,0 +1,63 @@
+"""Scale reliability for the selected X/Y items
+
+Everything comes from one item covariance matrix C over complete cases
+(listwise deletion, as usual for Cronbach's alpha). With row sums
+r_i = sum_j C_ij and total variance T = sum(C):
+- alpha = k / (k - 1) * (1 - trace(C) / T)
+- dropping item i leaves variance T - 2 r_i + C_ii and trace trace(C) - C_ii,
+  so alpha-if-deleted for all items is O(k) once the row sums are known
+- corrected item-total r = (r_i - C_ii) / sqrt(C_ii * (T - 2 r_i + C_ii))
+"""
+import numpy as np
+import pandas as pd
+
+
+def item_covariance(items):
+    """Covariance matrix (ddof=1) of the items over complete cases, and the case count"""
+    X = items.to_numpy(dtype=np.float64, na_value=np.nan)
+    X = X[~np.isnan(X).any(axis=1)]
+    n = len(X)
+    if n < 2:
+        return np.full((X.shape[1], X.shape[1]), np.nan), n
+    Z = X - X.mean(axis=0)
+    return (Z.T @ Z) / (n - 1), n
+
+
+def _alpha(k, trace, total):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((k > 1) & (total > 0), k / (k - 1) * (1 - trace / total), np.nan)
+
+
+def reliability(items):
+    """Cronbach's alpha plus per-item alpha-if-deleted and corrected item-total correlations"""
+    C, n = item_covariance(items)
+    k = C.shape[0]
+    diag = np.diag(C)
+    rows = C.sum(axis=1)
+    total = rows.sum()
+    trace = diag.sum()
+
+    rest_var = total - 2 * rows + diag
+    with np.errstate(invalid="ignore", divide="ignore"):
+        item_total_r = (rows - diag) / np.sqrt(diag * rest_var)
+    table = pd.DataFrame({
+        "Item variance": diag,
+        "Corrected item-total r": item_total_r,
+        "Alpha if item deleted": _alpha(k - 1, trace - diag, rest_var),
+    }, index=pd.Index(items.columns, name="Item"))
+    return {
+        "alpha": float(_alpha(k, trace, total)),
+        "n_items": k,
+        "n_cases": n,
+        "items": table,
+    }
+
+
+def interpret_alpha(alpha):
+    if np.isnan(alpha):
+        return "not available"
+    for threshold, label in ((0.9, "excellent"), (0.8, "good"), (0.7, "acceptable"),
+                             (0.6, "questionable"), (0.5, "poor")):
+        if alpha >= threshold:
+            return label
+    return "unacceptable"
@@ -0,0 +1,256 @@
+"""Bootstrap confidence intervals and permutation p-values for the association tests
+
+Resamples are generated in chunks (bounded by max_bytes), each chunk with
+its own child of one seeded SeedSequence, and chunks run on a thread pool;
+results depend only on the seed and chunk size, not on the worker count.
+
+Two representations are used:
+- cell form: when the (x, y) pairs take few distinct values (Likert totals,
+  binned crosstabs), the data is collapsed into distinct cells with counts.
+  A bootstrap resample is then a multinomial draw of cell counts and a
+  permutation is a random table with the same margins (chained
+  hypergeometric draws), so the cost no longer depends on the row count.
+- index form: otherwise, resamples are drawn as an index matrix
+  (resamples x rows) and correlations are computed row-wise in batch.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import stats
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+MAX_CELLS = 50_000
+
+
+# ================== BATCHED STATISTICS ==================
+def _weighted_pearson(w, xv, yv):
+    """Pearson r for each row of cell weights w (b, m); xv/yv are (m,) or (b, m) values"""
+    n = w.sum(axis=1)
+    sx, sy = (w * xv).sum(axis=1), (w * yv).sum(axis=1)
+    sxx, syy, sxy = (w * xv * xv).sum(axis=1), (w * yv * yv).sum(axis=1), (w * xv * yv).sum(axis=1)
+    cov = n * sxy - sx * sy
+    var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return cov / np.sqrt(var)
+
+
+def _pearson_rows(X, Y):
+    """Pearson r for each row pair of (b, n) matrices"""
+    X = X - X.mean(axis=1, keepdims=True)
+    Y = Y - Y.mean(axis=1, keepdims=True)
+    num = np.einsum("ij,ij->i", X, Y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return num / np.sqrt(np.einsum("ij,ij->i", X, X) * np.einsum("ij,ij->i", Y, Y))
+
+
+def _midranks(counts):
+    """Average ranks of ordered levels given their counts (b, k); same tie rule as rankdata"""
+    before = np.cumsum(counts, axis=1) - counts
+    return before + (counts + 1) / 2.0
+
+
+def cramers_v(chi2, n, shape):
+    k = min(shape) - 1
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sqrt(chi2 / (n * k)) if k > 0 else np.full(np.shape(chi2), np.nan)
+
+
+# ================== CELL FORM ==================
+class Cells:
+    """Distinct (x, y) levels with their counts, as a kx x ky table"""
+
+    def __init__(self, x_levels, y_levels, table):
+        self.x_levels = np.asarray(x_levels, dtype=np.float64)
+        self.y_levels = np.asarray(y_levels, dtype=np.float64)
+        self.table = np.asarray(table, dtype=np.int64)
+        kx, ky = self.table.shape
+        self.xi = np.repeat(np.arange(kx), ky)  # cell -> x level
+        self.yi = np.tile(np.arange(ky), kx)    # cell -> y level
+        self.n = int(self.table.sum())
+
+    @classmethod
+    def from_pairs(cls, x, y):
+        x_levels, xi = np.unique(x, return_inverse=True)
+        y_levels, yi = np.unique(y, return_inverse=True)
+        table = np.bincount(xi * len(y_levels) + yi, minlength=len(x_levels) * len(y_levels))
+        return cls(x_levels, y_levels, table.reshape(len(x_levels), len(y_levels)))
+
+    @property
+    def size(self):
+        return self.table.size
+
+    def weights(self):
+        return self.table.ravel()[np.newaxis, :].astype(np.float64)
+
+    # ---------- statistics on (b, cells) weights ----------
+    def pearson(self, w):
+        xv = self.x_levels[self.xi] - self.x_levels.mean()
+        yv = self.y_levels[self.yi] - self.y_levels.mean()
+        return _weighted_pearson(w, xv, yv)
+
+    def spearman(self, w):
+        kx, ky = self.table.shape
+        W = w.reshape(len(w), kx, ky)
+        rx = _midranks(W.sum(axis=2))[:, self.xi]
+        ry = _midranks(W.sum(axis=1))[:, self.yi]
+        return _weighted_pearson(w, rx - rx.mean(), ry - ry.mean())
+
+    def chi2(self, w):
+        kx, ky = self.table.shape
+        W = w.reshape(len(w), kx, ky)
+        n = W.sum(axis=(1, 2))[:, None, None]
+        expected = W.sum(axis=2)[:, :, None] * W.sum(axis=1)[:, None, :] / n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            terms = np.where(expected > 0, (W - expected) ** 2 / expected, 0.0)
+        return terms.sum(axis=(1, 2))
+
+    def cramers_v(self, w):
+        return cramers_v(self.chi2(w), w.sum(axis=1), self.table.shape)
+
+    # ---------- resampling ----------
+    def bootstrap(self, rng, b):
+        p = self.table.ravel() / self.n
+        return rng.multinomial(self.n, p, size=b).astype(np.float64)
+
+    def permute(self, rng, b):
+        """Random tables with the observed margins (what shuffling y against x produces)"""
+        rows, cols = self.table.sum(axis=1), self.table.sum(axis=0)
+        kx, ky = self.table.shape
+        out = np.zeros((b, kx, ky), dtype=np.int64)
+        remaining = np.tile(cols, (b, 1))
+        for i in range(kx):
+            need = np.full(b, rows[i], dtype=np.int64)
+            rest = remaining.sum(axis=1)
+            for j in range(ky - 1):
+                rest = rest - remaining[:, j]
+                d = rng.hypergeometric(remaining[:, j], rest, need) if rows[i] else np.zeros(b, np.int64)
+                out[:, i, j] = d
+                need -= d
+                remaining[:, j] -= d
+            out[:, i, ky - 1] = need
+            remaining[:, ky - 1] -= need
+        return out.reshape(b, kx * ky).astype(np.float64)
+
+
+# ================== INDEX FORM ==================
+def _rank_rows(M):
+    return stats.rankdata(M, axis=1)
+
+
+def _index_stat(method, X, Y):
+    if method == "spearman":
+        return _pearson_rows(_rank_rows(X), _rank_rows(Y))
+    return _pearson_rows(X, Y)
+
+
+# ================== DRIVER ==================
+def _chunks(n_resamples, chunk):
+    sizes = [chunk] * (n_resamples // chunk)
+    if n_resamples % chunk:
+        sizes.append(n_resamples % chunk)
+    return sizes
+
+
+def _run_chunks(job, n_resamples, bytes_per_resample, seed, workers, max_bytes):
+    chunk = int(max(1, min(n_resamples, max_bytes // max(bytes_per_resample, 1))))
+    sizes = _chunks(n_resamples, chunk)
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = root.spawn(len(sizes))
+    tasks = [(np.random.default_rng(s), b) for s, b in zip(seeds, sizes)]
+    workers = workers or default_workers()
+    if workers > 1 and len(tasks) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda t: job(*t), tasks))
+    else:
+        parts = [job(*t) for t in tasks]
+    return np.concatenate(parts)
+
+
+def default_workers():
+    return max(1, min(8, os.cpu_count() or 1))
+
+
+def _resample_stat(x, y, method, kind, n_resamples, seed, workers, max_bytes):
+    """Statistic under n_resamples bootstrap ("boot") or permutation ("perm") resamples"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    cells = Cells.from_pairs(x, y)
+    if cells.size <= min(MAX_CELLS, max(1, len(x) // 4)):
+        stat = cells.spearman if method == "spearman" else cells.pearson
+        draw = cells.bootstrap if kind == "boot" else cells.permute
+        observed = stat(cells.weights())[0]
+        values = _run_chunks(lambda rng, b: stat(draw(rng, b)), n_resamples,
+                             cells.size * 8 * 6, seed, workers, max_bytes)
+        return observed, values
+
+    n = len(x)
+    observed = _index_stat(method, x[None, :], y[None, :])[0]
+    if kind == "boot":
+        def job(rng, b):
+            idx = rng.integers(0, n, size=(b, n))
+            return _index_stat(method, x[idx], y[idx])
+    else:
+        # Ranks do not change under permutation, so Spearman only ranks once
+        xs = _rank_rows(x[None, :])[0] if method == "spearman" else x
+        ys = _rank_rows(y[None, :])[0] if method == "spearman" else y
+
+        def job(rng, b):
+            return _pearson_rows(np.broadcast_to(xs, (b, n)), rng.permuted(np.tile(ys, (b, 1)), axis=1))
+    values = _run_chunks(job, n_resamples, n * 8 * 4, seed, workers, max_bytes)
+    return observed, values
+
+
+def _percentile_ci(values, confidence):
+    alpha = (1.0 - confidence) / 2.0
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return np.nan, np.nan
+    low, high = np.quantile(finite, [alpha, 1.0 - alpha])
+    return float(low), float(high)
+
+
+def _perm_p_value(observed, values, two_sided=True):
+    """(1 + #as extreme) / (1 + resamples), so p is never reported as exactly zero"""
+    finite = values[np.isfinite(values)]
+    if two_sided:
+        extreme = np.abs(finite) >= abs(observed) - 1e-12
+    else:
+        extreme = finite >= observed - 1e-12
+    return float((1 + extreme.sum()) / (1 + finite.size))
+
+
+# ================== PUBLIC API ==================
+def bootstrap_ci(x, y, method="pearson", n_resamples=10_000, confidence=0.95,
+                 seed=0, workers=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Percentile bootstrap CI for Pearson r or Spearman rho"""
+    observed, values = _resample_stat(x, y, method, "boot", n_resamples, seed, workers, max_bytes)
+    low, high = _percentile_ci(values, confidence)
+    return {"estimate": float(observed), "ci_low": low, "ci_high": high,
+            "se": float(np.nanstd(values, ddof=1)), "n_resamples": n_resamples}
+
+
+def permutation_test(x, y, method="pearson", n_resamples=10_000,
+                     seed=0, workers=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Two-sided permutation p-value for Pearson r or Spearman rho"""
+    observed, values = _resample_stat(x, y, method, "perm", n_resamples, seed, workers, max_bytes)
+    return {"estimate": float(observed), "p_value": _perm_p_value(observed, values),
+            "n_resamples": n_resamples}
+
+
+def chi2_resampling(table, n_resamples=10_000, confidence=0.95,
+                    seed=0, workers=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Permutation p-value of the chi-square statistic and a bootstrap CI for Cramer's V"""
+    cells = Cells(np.arange(table.shape[0]), np.arange(table.shape[1]), np.asarray(table))
+    w = cells.weights()
+    chi2 = cells.chi2(w)[0]
+    seeds = np.random.SeedSequence(seed).spawn(2)
+    bytes_per = cells.size * 8 * 6
+    perm = _run_chunks(lambda rng, b: cells.chi2(cells.permute(rng, b)),
+                       n_resamples, bytes_per, seeds[0], workers, max_bytes)
+    boot = _run_chunks(lambda rng, b: cells.cramers_v(cells.bootstrap(rng, b)),
+                       n_resamples, bytes_per, seeds[1], workers, max_bytes)
+    low, high = _percentile_ci(boot, confidence)
+    return {"chi2": float(chi2), "p_value": _perm_p_value(chi2, perm, two_sided=False),
+            "cramers_v": float(cells.cramers_v(w)[0]), "v_ci_low": low, "v_ci_high": high,
+            "n_resamples": n_resamples}
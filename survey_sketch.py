@@ -0,0 +1,368 @@
+"""Mergeable streaming summaries for survey files larger than memory
+
+Each column gets a ColumnSummary that is updated chunk by chunk:
+- moments (count, mean, variance) merged with Chan's parallel formulas
+- a KLL sketch for quantiles (rank error roughly 1.7 / k)
+- exact value counts while the column has few distinct values (Likert
+  answers and totals always do), switching to a count-min sketch with a
+  small candidate set for the mode once it passes max_exact values
+
+Quantiles and mode are exact while the counts are exact. Summaries built
+from different files or processes can be merged with merge().
+
+Example:
+    python survey_sketch.py part1.csv part2.csv --columns "2. Age (numeric)" --k 400
+"""
+import argparse
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# ================== QUANTILES (KLL) ==================
+class KLLSketch:
+    """KLL quantile sketch over floats; k controls accuracy (rank error ~1.7 / k)
+
+    The seed fixes the compaction coin flips, so the same data always gives
+    the same quantiles.
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def for_error(cls, rank_error, seed=0):
+        return cls(k=max(8, math.ceil(1.7 / rank_error)), seed=seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) <= self._capacity(level):
+                level += 1
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            leftover = items[len(items) - len(items) % 2:]
+            # Keep every other item (random offset) at twice the weight
+            promoted = items[self._rng.integers(2):len(items) - len(leftover):2]
+            self.levels[level] = leftover
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            # Capacities shrink when a level is added, so start over from the bottom
+            level = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.levels[0] = np.concatenate([self.levels[0], values])
+            self.n += values.size
+            self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, qs):
+        """Approximate quantiles for probabilities qs (NaN when empty)"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lv), 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum, qs * cum[-1], side="left")
+        return items[np.clip(idx, 0, len(items) - 1)]
+
+
+# ================== FREQUENCIES (exact -> count-min) ==================
+class FrequencySketch:
+    """Exact value counts up to max_exact distinct values, count-min beyond that
+
+    The count-min table has width e / eps and depth ln(1 / delta), so an
+    estimated count exceeds the true one by at most eps * n with
+    probability 1 - delta. Only the `candidates` most frequent values are
+    tracked for the mode once the sketch is approximate.
+    """
+
+    def __init__(self, max_exact=10_000, eps=1e-3, delta=1e-3, candidates=64, seed=0):
+        self.max_exact = max_exact
+        self.eps = eps
+        self.delta = delta
+        self.n_candidates = candidates
+        self.seed = seed
+        self.n = 0
+        self.counts = pd.Series(dtype=np.int64)  # exact counts, index = value
+        self.table = None
+        self.candidates = pd.Series(dtype=np.int64)
+
+    @property
+    def exact(self):
+        return self.table is None
+
+    # ---------- count-min ----------
+    def _init_table(self):
+        width_bits = max(4, math.ceil(math.log2(math.e / self.eps)))
+        depth = max(1, math.ceil(math.log(1.0 / self.delta)))
+        rng = np.random.default_rng(self.seed)
+        self._shift = np.uint64(64 - width_bits)
+        self._a = rng.integers(1, 2 ** 63, size=depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=depth, dtype=np.uint64)
+        self.table = np.zeros((depth, 1 << width_bits), dtype=np.int64)
+
+    def _buckets(self, values):
+        keys = (np.asarray(values, dtype=np.float64) + 0.0).view(np.uint64)  # +0.0 folds -0.0 into 0.0
+        with np.errstate(over="ignore"):
+            return (self._a[:, None] * keys[None, :] + self._b[:, None]) >> self._shift
+
+    def _cm_add(self, values, counts):
+        rows = np.arange(self.table.shape[0])[:, None]
+        np.add.at(self.table, (rows, self._buckets(values).astype(np.intp)), counts[None, :])
+
+    def _cm_estimate(self, values):
+        rows = np.arange(self.table.shape[0])[:, None]
+        return self.table[rows, self._buckets(values).astype(np.intp)].min(axis=0)
+
+    def _refresh_candidates(self, values):
+        values = np.union1d(self.candidates.index.to_numpy(dtype=np.float64), values)
+        est = pd.Series(self._cm_estimate(values), index=values)
+        self.candidates = est.nlargest(self.n_candidates, keep="all")
+
+    def _switch_to_count_min(self):
+        self._init_table()
+        values = self.counts.index.to_numpy(dtype=np.float64)
+        self._cm_add(values, self.counts.to_numpy(dtype=np.int64))
+        self._refresh_candidates(values)
+        self.counts = pd.Series(dtype=np.int64)
+
+    # ---------- public API ----------
+    def add_counts(self, values, counts):
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.asarray(counts, dtype=np.int64)
+        self.n += int(counts.sum())
+        if self.exact:
+            self.counts = self.counts.add(pd.Series(counts, index=values), fill_value=0).astype(np.int64)
+            if len(self.counts) > self.max_exact:
+                self._switch_to_count_min()
+        else:
+            self._cm_add(values, counts)
+            self._refresh_candidates(values)
+        return self
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.add_counts(*np.unique(values, return_counts=True))
+        return self
+
+    def merge(self, other):
+        if other.exact:
+            if len(other.counts):
+                self.add_counts(other.counts.index.to_numpy(), other.counts.to_numpy())
+            return self
+        if self.exact:
+            # Adopt the other's hash functions, then fold our exact counts in
+            mine = self.counts
+            self.seed, self.eps, self.delta = other.seed, other.eps, other.delta
+            self._init_table()
+            self.table += other.table
+            self.n += other.n
+            self.counts = pd.Series(dtype=np.int64)
+            self.candidates = other.candidates.copy()
+            if len(mine):
+                self.n -= int(mine.sum())
+                self.add_counts(mine.index.to_numpy(), mine.to_numpy())
+            else:
+                self._refresh_candidates(np.empty(0))
+            return self
+        if self.table.shape != other.table.shape or self.seed != other.seed:
+            raise ValueError("Count-min sketches need the same eps, delta and seed to be merged")
+        self.table += other.table
+        self.n += other.n
+        self._refresh_candidates(other.candidates.index.to_numpy(dtype=np.float64))
+        return self
+
+    def mode(self):
+        """Most frequent value(s), sorted; exact while the counts are exact"""
+        counts = self.counts if self.exact else self.candidates
+        if counts.empty:
+            return np.empty(0)
+        return np.sort(counts.index[counts == counts.max()].to_numpy(dtype=np.float64))
+
+    def quantile(self, qs):
+        """Exact quantiles from the value counts (linear interpolation, as np.quantile)"""
+        qs = np.atleast_1d(np.asarray(qs, dtype=np.float64))
+        if self.counts.empty:
+            return np.full(qs.shape, np.nan)
+        counts = self.counts.sort_index()
+        values = counts.index.to_numpy(dtype=np.float64)
+        ends = np.cumsum(counts.to_numpy())  # value i covers sorted positions [ends[i-1], ends[i])
+        pos = qs * (ends[-1] - 1)
+        lo, hi = np.floor(pos), np.ceil(pos)
+        v_lo = values[np.searchsorted(ends, lo, side="right")]
+        v_hi = values[np.searchsorted(ends, hi, side="right")]
+        return v_lo + (v_hi - v_lo) * (pos - lo)
+
+
+# ================== COLUMN SUMMARY ==================
+class ColumnSummary:
+    """Streaming, mergeable summary of one numeric column"""
+
+    def __init__(self, k=200, max_exact=10_000, cm_eps=1e-3, cm_delta=1e-3, seed=0):
+        self.n = 0
+        self.mean_ = 0.0
+        self.m2 = 0.0
+        self.min_ = np.inf
+        self.max_ = -np.inf
+        self.kll = KLLSketch(k=k, seed=seed)
+        self.freq = FrequencySketch(max_exact=max_exact, eps=cm_eps, delta=cm_delta)
+
+    def _merge_moments(self, n, mean, m2):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean_
+        self.mean_ += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        mean = values.mean()
+        self._merge_moments(values.size, mean, float(((values - mean) ** 2).sum()))
+        self.min_ = min(self.min_, values.min())
+        self.max_ = max(self.max_, values.max())
+        self.kll.update(values)
+        self.freq.update(values)
+        return self
+
+    def merge(self, other):
+        self._merge_moments(other.n, other.mean_, other.m2)
+        self.min_ = min(self.min_, other.min_)
+        self.max_ = max(self.max_, other.max_)
+        self.kll.merge(other.kll)
+        self.freq.merge(other.freq)
+        return self
+
+    @property
+    def exact(self):
+        """True while quantiles and mode are exact"""
+        return self.freq.exact
+
+    def mean(self):
+        return self.mean_ if self.n else np.nan
+
+    def std(self, ddof=1):
+        return math.sqrt(self.m2 / (self.n - ddof)) if self.n > ddof else np.nan
+
+    def quantile(self, qs):
+        out = self.freq.quantile(qs) if self.exact else self.kll.quantile(qs)
+        qs = np.atleast_1d(qs)
+        if self.n:
+            out = np.where(qs <= 0, self.min_, np.where(qs >= 1, self.max_, out))
+        return out
+
+    def median(self):
+        return float(self.quantile(0.5)[0])
+
+    def mode(self):
+        return self.freq.mode()
+
+    def qcut_edges(self, bins):
+        """Bin edges equivalent to pd.qcut(..., q=bins, duplicates="drop"), for use with pd.cut"""
+        return np.unique(self.quantile(np.linspace(0, 1, bins + 1)))
+
+    def to_dict(self):
+        q1, median, q3 = self.quantile([0.25, 0.5, 0.75]) if self.n else (np.nan,) * 3
+        return {
+            "count": self.n,
+            "mean": self.mean(),
+            "std": self.std(),
+            "min": self.min_ if self.n else np.nan,
+            "q1": float(q1),
+            "median": float(median),
+            "q3": float(q3),
+            "max": self.max_ if self.n else np.nan,
+            "mode": self.mode().tolist(),
+            "exact": self.exact,
+        }
+
+
+def summarize_series(values, **options):
+    return ColumnSummary(**options).update(values)
+
+
+def summarize_chunks(chunks, columns=None, summaries=None, **options):
+    """Update (or create) one ColumnSummary per column from an iterable of DataFrames"""
+    summaries = {} if summaries is None else summaries
+    for chunk in chunks:
+        for col in (columns or chunk.columns):
+            values = pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            if col not in summaries:
+                summaries[col] = ColumnSummary(**options)
+            summaries[col].update(values)
+    return summaries
+
+
+def summarize_csv(paths, columns=None, chunksize=200_000, summaries=None, **options):
+    """Summarize one or more CSV files chunk by chunk; the summaries merge across files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        reader = pd.read_csv(path, usecols=columns, chunksize=chunksize)
+        summaries = summarize_chunks(reader, columns, summaries, **options)
+    return summaries
+
+
+def merge_summaries(*parts):
+    """Merge dicts of ColumnSummary (e.g. one per file or worker) column by column"""
+    merged = {}
+    for part in parts:
+        for col, summary in part.items():
+            if col in merged:
+                merged[col].merge(summary)
+            else:
+                merged[col] = summary
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming summary of survey CSV files")
+    parser.add_argument("paths", nargs="+", help="CSV files (summaries are merged across them)")
+    parser.add_argument("--columns", nargs="+", default=None, help="Columns to summarize (default: all)")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--k", type=int, default=200, help="KLL accuracy (rank error ~1.7 / k)")
+    parser.add_argument("--max-exact", type=int, default=10_000, help="Distinct values kept as exact counts")
+    parser.add_argument("--cm-eps", type=float, default=1e-3, help="Count-min overcount bound as a fraction of n")
+    args = parser.parse_args()
+
+    summaries = summarize_csv(
+        args.paths, args.columns, args.chunksize,
+        k=args.k, max_exact=args.max_exact, cm_eps=args.cm_eps,
+    )
+    report = {col: s.to_dict() for col, s in summaries.items()}
+    print(json.dumps(report, indent=2, default=float))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Batched descriptive statistics for many numeric survey columns
+
+All selected columns are coerced into one float64 matrix and sorted once
+per column; mean, std, median, min, max and mode all come from that
+sorted matrix in vectorized NumPy.
+
+Frequency tables work on categorical codes: one bincount per column gives
+counts and percentages, and a grouped breakdown is a bincount over
+group_code * n_categories + code.
+"""
+import numpy as np
+import pandas as pd
+
+from survey_likert import column_codes
+
+STAT_NAMES = ["Mean", "Median", "Minimum", "Maximum", "Std Dev"]
+
+
+def numeric_matrix(df, columns):
+    """Selected columns as one (rows, columns) float64 matrix; non-numeric values become NaN"""
+    out = np.empty((len(df), len(columns)), dtype=np.float64, order="F")  # column-contiguous for the per-column sort
+    for j, col in enumerate(columns):
+        series = df[col]
+        if not pd.api.types.is_numeric_dtype(series):
+            series = pd.to_numeric(series, errors="coerce")
+        out[:, j] = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return out
+
+
+def _modes(sorted_col, count):
+    """All most frequent values of one sorted column (same tie rule as Series.mode)"""
+    values = sorted_col[:count]
+    if count == 0:
+        return values
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    runs = np.diff(np.r_[starts, count])
+    return values[starts[runs == runs.max()]]
+
+
+def describe_matrix(X):
+    """Count, mean, median, min, max, std (ddof=1) and modes for every column of X"""
+    n, k = X.shape
+    S = np.sort(X, axis=0)  # NaN sorts last, so the first count rows are the valid values
+    missing = np.isnan(X)
+    count = n - missing.sum(axis=0)
+    cols = np.arange(k)
+    has = count > 0
+    safe = np.maximum(count, 1)
+
+    dev = np.where(missing, 0.0, X)
+    mean = np.where(has, dev.sum(axis=0) / safe, np.nan)
+    dev -= mean
+    dev[missing] = 0.0
+    sq = np.einsum("ij,ij->j", dev, dev)
+    std = np.where(count > 1, np.sqrt(sq / np.maximum(count - 1, 1)), np.nan)
+
+    lo = S[(safe - 1) // 2, cols]
+    hi = S[safe // 2, cols]
+    median = np.where(has, (lo + hi) / 2.0, np.nan)
+    minimum = np.where(has, S[0], np.nan)
+    maximum = np.where(has, S[safe - 1, cols], np.nan)
+    modes = [_modes(S[:, j], int(count[j])) for j in range(k)]
+    return {
+        "count": count, "mean": mean, "median": median,
+        "min": minimum, "max": maximum, "std": std, "modes": modes,
+    }
+
+
+def describe_columns(df, columns):
+    """Batched statistics for the given columns as a DataFrame indexed by column name"""
+    columns = list(columns)
+    X = numeric_matrix(df, columns)
+    return pd.DataFrame(describe_matrix(X), index=pd.Index(columns, name="Column"))
+
+
+def stats_rows(summary, col):
+    """(Statistic, Value) rows for one column, in the order shown in the app"""
+    row = summary.loc[col]
+    values = [row["mean"], row["median"], row["min"], row["max"], row["std"]]
+    return list(zip(STAT_NAMES, values)) + [(f"Mode {i+1}", v) for i, v in enumerate(row["modes"])]
+
+
+# ================== FREQUENCY TABLES ==================
+def _codes_and_labels(series):
+    """Integer codes with missing values as the last label ("nan", as value_counts shows it)"""
+    codes, uniques = column_codes(series)
+    labels = np.append(np.asarray(uniques, dtype=object).astype(str), "nan")
+    codes = np.where(codes < 0, len(labels) - 1, codes)
+    # Categoricals list unused categories with a zero count, like value_counts does
+    always = np.zeros(len(labels), dtype=bool)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        always[:-1] = True
+    return codes, labels, always
+
+
+def frequency_table(df, col, by=None):
+    """Counts and percentages of one column, optionally broken down by a grouping column
+
+    Without `by`: Category, Frequency, Percentage (most frequent first).
+    With `by`: Group, Category, Frequency, Percentage, where the percentage
+    is within the group.
+    """
+    codes, labels, always = _codes_and_labels(df[col])
+    if by is None:
+        counts = np.bincount(codes, minlength=len(labels))
+        keep = np.flatnonzero((counts > 0) | always)
+        keep = keep[np.argsort(-counts[keep], kind="stable")]
+        total = counts.sum()
+        return pd.DataFrame({
+            "Category": labels[keep],
+            "Frequency": counts[keep],
+            "Percentage": np.round(counts[keep] * 100.0 / max(total, 1), 2),
+        })
+
+    g_codes, g_labels, _ = _codes_and_labels(df[by])
+    table = np.bincount(
+        g_codes * len(labels) + codes, minlength=len(g_labels) * len(labels)
+    ).reshape(len(g_labels), len(labels))
+    groups = np.flatnonzero(table.sum(axis=1) > 0)
+    cats = np.flatnonzero((table.sum(axis=0) > 0) | always)
+    cats = cats[np.argsort(-table[:, cats].sum(axis=0), kind="stable")]
+    sub = table[np.ix_(groups, cats)]
+    share = sub * 100.0 / np.maximum(sub.sum(axis=1, keepdims=True), 1)
+    return pd.DataFrame({
+        "Group": np.repeat(g_labels[groups], len(cats)),
+        "Category": np.tile(labels[cats], len(groups)),
+        "Frequency": sub.ravel(),
+        "Percentage": np.round(share.ravel(), 2),
+    })
+
+
+def frequency_tables(df, columns, by=None):
+    """Frequency tables for all columns at once: {column: table}"""
+    return {col: frequency_table(df, col, by) for col in columns if col != by}
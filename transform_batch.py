@@ -0,0 +1,119 @@
+"""Batched 2D homogeneous transforms: K matrices x N points in one matmul
+
+Shapes are flattened into one (N, 2) vertex array (keep the per-shape
+offsets if you need to split them again); matrices are stacked as (K, 3, 3).
+The result is a (K, N, 3) homogeneous stack, one slice per matrix.
+"""
+import numpy as np
+
+
+# =========================
+# Batched matrix builders
+# =========================
+def _stack(a, b, c, d, e, f):
+    a, b, c, d, e, f = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (a, b, c, d, e, f)))
+    M = np.zeros(a.shape + (3, 3))
+    M[..., 0, 0], M[..., 0, 1], M[..., 0, 2] = a, b, c
+    M[..., 1, 0], M[..., 1, 1], M[..., 1, 2] = d, e, f
+    M[..., 2, 2] = 1.0
+    return M
+
+
+def translation_matrices(tx, ty):
+    return _stack(1, 0, tx, 0, 1, ty)
+
+
+def scaling_matrices(sx, sy):
+    return _stack(sx, 0, 0, 0, sy, 0)
+
+
+def rotation_matrices(theta_deg):
+    theta = np.deg2rad(np.asarray(theta_deg, dtype=float))
+    c, s = np.cos(theta), np.sin(theta)
+    return _stack(c, -s, 0, s, c, 0)
+
+
+def shearing_matrices(shx, shy):
+    return _stack(1, shx, 0, shy, 1, 0)
+
+
+def compose(*stages):
+    """Compose (..., 3, 3) stages in application order; stacks broadcast against each other"""
+    M = np.eye(3)
+    for stage in stages:
+        M = np.matmul(stage, M)
+    return M
+
+
+# =========================
+# Batched point transform
+# =========================
+def to_homogeneous_points(points_xy):
+    points_xy = np.asarray(points_xy, dtype=float)
+    return np.concatenate([points_xy, np.ones(points_xy.shape[:-1] + (1,))], axis=-1)
+
+
+def transform_points_batch(points_xy, matrices):
+    """Apply K matrices to N points at once: (N, 2) x (K, 3, 3) -> (K, N, 3) homogeneous"""
+    matrices = np.asarray(matrices, dtype=float)
+    if matrices.ndim == 2:
+        matrices = matrices[np.newaxis]
+    pts_h = to_homogeneous_points(points_xy)
+    # (K, N, 3) = (N, 3) @ (K, 3, 3)^T
+    return np.matmul(pts_h, np.swapaxes(matrices, -1, -2))
+
+
+def homogeneous_to_xy(pts_h):
+    return pts_h[..., :2] / pts_h[..., 2:3]
+
+
+def concat_shapes(shapes):
+    """Flatten a list of (P_i, 2) shapes into one (N, 2) array plus split offsets"""
+    offsets = np.cumsum([0] + [len(s) for s in shapes])
+    return np.concatenate(shapes, axis=0), offsets
+
+
+# =========================
+# Vectorized serialization
+# =========================
+# One %-format over the whole flattened array runs in C, several times
+# faster than formatting each vertex in a Python loop.
+def format_points(points_xy, fmt="%.2f,%.2f", sep=" "):
+    """Format (N, 2) points as 'x,y x,y ...'"""
+    points_xy = np.asarray(points_xy, dtype=float)
+    if points_xy.shape[0] == 0:
+        return ""
+    template = (fmt + sep) * points_xy.shape[0]
+    return (template % tuple(points_xy.ravel().tolist()))[:-len(sep)]
+
+
+def svg_points(points_xy, width=240, height=240, padding=20):
+    """Fit points into the SVG viewport (y axis up) and format them for <polyline points=...>"""
+    points_xy = np.asarray(points_xy, dtype=float)
+    mins = points_xy.min(axis=0)
+    span = np.maximum(points_xy.max(axis=0) - mins, 1e-6)
+    scale = min((width - 2 * padding) / span[0], (height - 2 * padding) / span[1])
+    screen = np.empty_like(points_xy)
+    screen[:, 0] = padding + (points_xy[:, 0] - mins[0]) * scale
+    screen[:, 1] = height - (padding + (points_xy[:, 1] - mins[1]) * scale)
+    return format_points(screen)
+
+
+def batch_to_csv(pts_h, labels=None, frame_values=None, frame_name="frame", float_fmt="%.6f"):
+    """CSV text for a (K, N, 3) stack: one row per (frame, point)"""
+    xy = homogeneous_to_xy(np.asarray(pts_h, dtype=float))
+    K, N = xy.shape[:2]
+    frames = np.arange(K) if frame_values is None else np.asarray(frame_values, dtype=float)
+    point_col = np.tile(np.arange(N) if labels is None else np.asarray(labels, dtype=object), K)
+
+    table = np.empty((K * N, 4), dtype=object)
+    table[:, 0] = np.repeat(frames, N)
+    table[:, 1] = point_col
+    table[:, 2] = xy[..., 0].ravel()
+    table[:, 3] = xy[..., 1].ravel()
+
+    frame_fmt = "%d" if frame_values is None else "%g"
+    point_name, point_fmt = ("point", "%d") if labels is None else ("Label", "%s")
+    row_fmt = f"{frame_fmt},{point_fmt},{float_fmt},{float_fmt}\n"
+    header = f"{frame_name},{point_name},x,y\n"
+    return header + (row_fmt * (K * N)) % tuple(table.ravel().tolist())
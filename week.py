@@ -5,6 +5,11 @@ import matplotlib.pyplot as plt
 import html
 import streamlit.components.v1 as components
 from io import BytesIO
+from transform_batch import (
+    transform_points_batch, homogeneous_to_xy, svg_points, batch_to_csv,
+    rotation_matrices, compose,
+)
+from instrumentation import StageRecorder, stage, timed, use_recorder, sidebar_panel
 
 
 # =========================
@@ -118,6 +123,11 @@ def tr_ui(key: str, lang: str, default: str = "") -> str:
 # =========================
 if "theme_mode" not in st.session_state:
     st.session_state["theme_mode"] = "Light"
+if "perf_recorder" not in st.session_state:
+    st.session_state["perf_recorder"] = StageRecorder()
+
+# Stages of this run (transform, SVG, exports) go to the Performance panel
+use_recorder(st.session_state["perf_recorder"]).start_run()
 
 # =========================
 # Sidebar
@@ -313,12 +323,9 @@ def reflection_matrix(mode):
         return np.eye(3)
 
 
+@timed("transform")
 def apply_transform(points_xy, M):
-    ones = np.ones((points_xy.shape[0], 1))
-    pts_h = np.hstack([points_xy, ones])
-    pts_trans_h = (M @ pts_h.T).T
-    pts_trans_xy = pts_trans_h[:, :2] / pts_trans_h[:, 2][:, np.newaxis]
-    return pts_trans_xy
+    return homogeneous_to_xy(transform_points_batch(points_xy, M)[0])
 
 
 def square_points():
@@ -351,28 +358,13 @@ def regular_polygon_points(n_sides=5, radius=1.0, center=(0.0, 0.0)):
     return pts, labels
 
 
+@timed("svg")
 def polygon_to_svg(points_xy, width=240, height=240, padding=20,
                    stroke_color="#10B981", bg_color="#FFFFFF"):
     if points_xy.shape[0] == 0:
         return f"<svg width='{width}' height='{height}'></svg>"
 
-    xs, ys = points_xy[:, 0], points_xy[:, 1]
-    min_x, max_x = xs.min(), xs.max()
-    min_y, max_y = ys.min(), ys.max()
-    span_x = max(max_x - min_x, 1e-6)
-    span_y = max(max_y - min_y, 1e-6)
-    scale = min(
-        (width - 2 * padding) / span_x,
-        (height - 2 * padding) / span_y
-    )
-
-    svg_points = []
-    for x, y in points_xy:
-        sx = padding + (x - min_x) * scale
-        sy = height - (padding + (y - min_y) * scale)
-        svg_points.append(f"{sx:.2f},{sy:.2f}")
-
-    points_str = " ".join(svg_points)
+    points_str = svg_points(points_xy, width, height, padding)
     points_str = html.escape(points_str)
 
     svg = f"""
@@ -525,6 +517,7 @@ with col_a:
 # =========================
 # PDF report (A4) helper
 # =========================
+@timed("pdf_build")
 def create_full_pdf(df_before, df_after, T, S, R, H, F, M_composite,
                     shape_name, lang, tx, ty, sx, sy, theta, shx, shy,
                     reflection_mode, order):
@@ -611,14 +604,11 @@ COMPOSITION ORDER
     ax_table.axis("off")
 
     table_data = [["Label", "x", "y", "x'", "y'"]]
-    for i in range(len(df_before)):
-        table_data.append([
-            str(df_before["Label"].iloc[i]),
-            f"{df_before['x'].iloc[i]:.3f}",
-            f"{df_before['y'].iloc[i]:.3f}",
-            f"{df_after['x'].iloc[i]:.3f}",
-            f"{df_after['y'].iloc[i]:.3f}",
-        ])
+    coords = np.column_stack([df_before[["x", "y"]].to_numpy(), df_after[["x", "y"]].to_numpy()])
+    table_data += [
+        [str(label)] + [f"{v:.3f}" for v in row]
+        for label, row in zip(df_before["Label"].tolist(), coords.tolist())
+    ]
 
     table = ax_table.table(
         cellText=table_data,
@@ -702,6 +692,7 @@ Composite Matrix M
     return buf.getvalue()
 
 
+@timed("figure_export")
 def get_figure_bytes(fig, fmt="png"):
     buf = BytesIO()
     fig.savefig(buf, format=fmt, bbox_inches="tight")
@@ -715,7 +706,7 @@ def get_figure_bytes(fig, fmt="png"):
 st.markdown("## Export to Download")
 export_type = st.selectbox(
     tr_ui("export_select_label", lang, "Select export type"),
-    ["Plot (PNG/JPG)", "Full Report (PDF A4)", "Coordinate Data (CSV)"]
+    ["Plot (PNG/JPG)", "Full Report (PDF A4)", "Coordinate Data (CSV)", "Rotation Sweep (CSV)"]
 )
 
 if export_type == "Plot (PNG/JPG)":
@@ -769,6 +760,24 @@ elif export_type == "Full Report (PDF A4)":
         unsafe_allow_html=True
     )
 
+elif export_type == "Rotation Sweep (CSV)":
+    # Every θ in one batched matmul: the composite with R swapped for a (K, 3, 3) stack
+    sweep_step = st.slider("Sweep step (degrees)", 1, 45, 5)
+    # Stop at 180° even when the step does not divide 360 (step 7 would reach 184°)
+    thetas = np.arange(-180, 180 + 1e-9, sweep_step)
+    sweep_stack = dict(symbol_to_matrix, R=rotation_matrices(thetas))
+    M_sweep = compose(*[sweep_stack[symbol] for symbol in order])
+    with stage("rotation_sweep"):
+        pts_sweep = transform_points_batch(pts, M_sweep)
+        csv_sweep = batch_to_csv(pts_sweep, labels=labels, frame_values=thetas, frame_name="theta")
+
+    st.download_button(
+        label=f"Download Rotation Sweep ({len(thetas)} frames, CSV)",
+        data=csv_sweep.encode("utf-8"),
+        file_name="rotation_sweep.csv",
+        mime="text/csv"
+    )
+
 else:
     csv_before = df_before.to_csv(index=False).encode("utf-8")
     csv_after = df_after.to_csv(index=False).encode("utf-8")
@@ -785,3 +794,9 @@ else:
         file_name="coords_after.csv",
         mime="text/csv"
     )
+
+# =========================
+# Performance panel
+# =========================
+# Per-stage timings of this session (wall, CPU, allocations) with JSON lines / Prometheus export
+sidebar_panel(st, st.session_state["perf_recorder"])